@@ -2,64 +2,110 @@
 
 from TicTacToe import *
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
 import random
+import sys
 
 class Agent(ABC):
 	@abstractmethod
-	def play(self, board):
+	def play(self, game):
+		"""game (TicTacToe など) の手番の手 (x, y) を返す。打てる手が無ければ None"""
 		pass
 
+	def play_batch(self, games):
+		"""BatchTicTacToe の進行中の各局で play を呼び、手 (セル番号 x * n + y) の配列を返す"""
+		n = games.size
+		actions = [0] * games.num_games
+		for k in games.active():
+			choice = self.play(games.view(k))
+			if choice:
+				actions[k] = choice[0] * n + choice[1]
+		return actions
+
 class RandomAgent(Agent):
-	def play(self, board):
-		random_choice = []
-		n = len(board)
-		for x in range(n):
-			for y in range(n):
-				if board[x][y] == Player.EMPTY:
-					random_choice.append((x, y))
-		if not random_choice:
+	def __init__(self, rng=None):
+		# rng: random.Random など。省略時は random モジュールの乱数を使う
+		self.rng = random if rng is None else rng
+
+	def play_batch(self, games):
+		return games.random_actions()
+
+	def play(self, game):
+		empty_cells = game.empty_cells
+		if not empty_cells:
 			return None
-		return random.choice(random_choice)
+		return divmod(self.rng.choice(empty_cells), game.size)
+
+def play_game(n, player1, player2):
+	"""player1 (X) と player2 (O) で 1 局対戦し、終わった TicTacToe を返す"""
+	game = TicTacToe(n)
+	while game.state == State.PLAYING:
+		if game.next == Player.X:
+			choice = player1.play(game)
+			if choice:
+				game.play(Player.X, choice[0], choice[1])
+		elif game.next == Player.O:
+			choice = player2.play(game)
+			if choice:
+				game.play(Player.O, choice[0], choice[1])
+	return game
+
+def run_trials(n, num_trials, seed=None):
+	"""ランダム同士で num_trials 局対戦し、(X の勝ち数, O の勝ち数, 引き分け数) を返す"""
+	rng = random.Random(seed)
+	player1 = RandomAgent(rng)
+	player2 = RandomAgent(rng)
+	x_wins = o_wins = draws = 0
+	for _ in range(num_trials):
+		game = play_game(n, player1, player2)
+		if game.state == State.DRAW:
+			draws += 1
+		elif game.winner == Player.X:
+			x_wins += 1
+		elif game.winner == Player.O:
+			o_wins += 1
+	return x_wins, o_wins, draws
+
+def _run_shard(args):
+	return run_trials(*args)
+
+def run_parallel(n, num_trials, workers=None, shard_size=10000, seed=0, report=None):
+	"""run_trials を shard_size 局ずつに分けてプロセスプールで実行し、集計を合算する
+
+	各シャードの乱数シードは seed から決まるので、workers を変えても結果は同じ。
+	report を渡すと、シャードが終わるたびに report(完了した局数) を呼ぶ。
+	"""
+	master = random.Random(seed)
+	shards = []
+	for start in range(0, num_trials, shard_size):
+		shards.append((n, min(shard_size, num_trials - start), master.getrandbits(64)))
+
+	x_wins = o_wins = draws = 0
+	done = 0
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		futures = {pool.submit(_run_shard, shard): shard for shard in shards}
+		for future in as_completed(futures):
+			x, o, d = future.result()
+			x_wins += x
+			o_wins += o
+			draws += d
+			done += futures[future][1]
+			if report:
+				report(done)
+	return x_wins, o_wins, draws
 
 if __name__ == "__main__":
+	# python Agent_vs_Agent.py [試行回数] [プロセス数]
 	n = 3
-	num_trials = 100000
-
-	# 統計を記録する変数
-	x_wins = 0
-	o_wins = 0
-	draws = 0
-
-	print(f"10万回の試行を開始します...\n")
-
-	for trial in range(num_trials):
-		game = TicTacToe(n)
-		player1 = RandomAgent()
-		player2 = RandomAgent()
-
-		while True:
-			if game.state != State.PLAYING:
-				if game.state == State.DRAW:
-					draws += 1
-				elif game.state == State.WON:
-					if game.winner == Player.X:
-						x_wins += 1
-					elif game.winner == Player.O:
-						o_wins += 1
-				break
-
-			if game.next == Player.X:
-				choice = player1.play(game.board)
-				if choice:
-					game.play(Player.X, choice[0], choice[1])
-			elif game.next == Player.O:
-				choice = player2.play(game.board)
-				if choice:
-					game.play(Player.O, choice[0], choice[1])
-
-		# 進捗表示（1万回ごと）
-		if (trial + 1) % 10000 == 0:
-			print(f"{trial + 1}回完了...")
+	num_trials = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+	workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+	print(f"{num_trials}回の試行を {workers} プロセスで開始します...\n")
+
+	# 進捗表示（1万回ごと）
+	x_wins, o_wins, draws = run_parallel(n, num_trials, workers,
+										 report=lambda done: print(f"{done}回完了..."))
 
 	# 結果を表示
 	print("\n" + "="*50)
@@ -69,4 +115,3 @@ if __name__ == "__main__":
 	print(f"Player O の勝利: {o_wins}回 ({o_wins/num_trials*100:.2f}%)")
 	print(f"引き分け: {draws}回 ({draws/num_trials*100:.2f}%)")
 	print("="*50)
-
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+K 局の TicTacToe を同時に進めるバッチ版
+
+盤面 (K, n, n)、合法手のマスク (K, n * n)、終了フラグ、勝者を NumPy 配列で持ち、
+1 回の step で進行中の全局に 1 手ずつ打つ。手はセル番号 x * n + y で指定する。
+全局が同じ手数で進むので、手番 (next) は全局で共通になる。
+
+    python BatchTicTacToe.py [対局数] [バッチサイズ]
+"""
+
+try:
+	import numpy as np
+except ImportError:
+	raise ImportError("BatchTicTacToe には NumPy が必要です。"
+					  "NumPy が無い環境では TicTacToe / BitboardTicTacToe を使ってください。")
+
+import sys
+import time
+
+from TicTacToe import Player, State, line_table, code_weights
+
+
+class BatchTicTacToe:
+	"""K 局を同時に進める TicTacToe
+
+	board[k, x, y] は k 局目のセル (x, y) の Player の値 (0: 空, 1: X, 2: O)。
+	winner も同じ値で持ち、0 は勝者なし (進行中か引き分け)。
+	"""
+	def __init__(self, size, num_games, early_draw=False, seed=None):
+		self.__size = size
+		self.__num_games = num_games
+		self.__early_draw = early_draw
+		self.rng = np.random.default_rng(seed)
+		# 各セルを通るラインの番号 (足りない分は番号 2n+2 のダミーで埋める)
+		cell_lines = line_table(size)[1]
+		n_lines = 2 * size + 2
+		width = max(len(lines) for lines in cell_lines)
+		self.__lines = np.full((size * size, width), n_lines, dtype=np.intp)
+		self.__valid = np.zeros((size * size, width), dtype=bool)
+		for idx, lines in enumerate(cell_lines):
+			self.__lines[idx, :len(lines)] = lines
+			self.__valid[idx, :len(lines)] = True
+		# 3 進数コードは 3 ** (n * n) 未満なので、int64 に収まらない盤面は Python の int で持つ
+		self.__code_dtype = np.int64 if size * size <= 39 else object
+		self.__weights = np.array(code_weights(size), dtype=self.__code_dtype)
+		self.reset()
+
+	def reset(self):
+		"""全局を初期状態に戻す"""
+		K, n = self.__num_games, self.__size
+		self.__board = np.zeros((K, n, n), dtype=np.int8)
+		self.__cells = self.__board.reshape(K, n * n)
+		self.__next = Player.X
+		self.__done = np.zeros(K, dtype=bool)
+		self.__winner = np.zeros(K, dtype=np.int8)
+		self.__count = 0
+		# ラインごとの各プレイヤーの石の数 [k, プレイヤー (X: 0, O: 1), ライン]
+		self.__line_counts = np.zeros((K, 2, 2 * n + 3), dtype=np.int32)
+		self.__blocked = np.zeros(K, dtype=np.int32)
+		self.__codes = np.zeros(K, dtype=self.__code_dtype)
+
+	@property
+	def size(self):
+		return self.__size
+
+	@property
+	def num_games(self):
+		return self.__num_games
+
+	@property
+	def next(self):
+		"""進行中の全局に共通の手番。全局が終われば None"""
+		return self.__next
+
+	@property
+	def board(self):
+		return self.__board
+
+	@property
+	def count(self):
+		"""進行中の局の手数"""
+		return self.__count
+
+	@property
+	def done(self):
+		return self.__done
+
+	@property
+	def winner(self):
+		return self.__winner
+
+	@property
+	def state(self):
+		"""各局の State の値 (0: PLAYING, 1: DRAW, 2: WON)"""
+		return np.where(self.__done, np.where(self.__winner > 0, State.WON.value, State.DRAW.value),
+						State.PLAYING.value)
+
+	@property
+	def codes(self):
+		"""各局の盤面の 3 進数コード (TicTacToe.code と同じ値)"""
+		return self.__codes
+
+	@property
+	def legal(self):
+		"""合法手のマスク (K, n * n)。終わった局は全て False"""
+		return (self.__cells == 0) & ~self.__done[:, None]
+
+	def active(self):
+		"""進行中の局の番号の配列"""
+		return np.flatnonzero(~self.__done)
+
+	def view(self, k):
+		"""k 局目を TicTacToe と同じ属性で読むための GameView"""
+		return GameView(self, k)
+
+	def board_of(self, k):
+		"""k 局目の盤面を TicTacToe.board と同じリストのリストにして返す"""
+		return [[Player(v) for v in row] for row in self.__board[k].tolist()]
+
+	def random_actions(self):
+		"""各局の合法手から一様に選んだ手の配列 (終わった局の値は使われない)"""
+		keys = self.rng.random(self.__cells.shape)
+		keys[~self.legal] = -1.0
+		return keys.argmax(axis=1)
+
+	def step(self, actions):
+		"""進行中の全局に手番のプレイヤーの石を置く
+
+		Args:
+			actions: 各局の手 (セル番号 x * n + y) の長さ K の配列。終わった局の値は無視する。
+		Raises:
+			ValueError: 進行中の局に範囲外か空いていないセルを指定した。
+		"""
+		if self.__next is None:
+			return
+		n = self.__size
+		active = np.flatnonzero(~self.__done)
+		a = np.asarray(actions, dtype=np.intp)[active]
+		if ((a < 0) | (a >= n * n)).any() or self.__cells[active, a].any():
+			raise ValueError('illegal move')
+
+		player = self.__next
+		p = player.value - 1
+		self.__cells[active, a] = player.value
+		self.__count += 1
+		self.__codes[active] += player.value * self.__weights[a]
+
+		# 置いたセルを通るラインの石の数だけを更新する
+		rows = active[:, None]
+		lines = self.__lines[a]
+		valid = self.__valid[a]
+		own = self.__line_counts[rows, p, lines] + 1
+		self.__line_counts[rows, p, lines] = own
+		other = self.__line_counts[rows, 1 - p, lines]
+		won = ((own == n) & valid).any(axis=1)
+		self.__blocked[active] += ((own == 1) & (other > 0) & valid).sum(axis=1)
+
+		finished = won | (self.__count == n * n)
+		if self.__early_draw:
+			finished |= self.__blocked[active] == 2 * n + 2
+		self.__winner[active[won]] = player.value
+		self.__done[active[finished]] = True
+
+		if self.__done.all():
+			self.__next = None
+		else:
+			self.__next = Player.O if player is Player.X else Player.X
+
+	def print_board(self, k):
+		for row in self.board_of(k):
+			print(' '.join(str(cell) for cell in row))
+
+
+class GameView:
+	"""BatchTicTacToe の 1 局分の読み取り専用ビュー
+
+	size / next / board / cells / snapshot / code / empty_cells / count / state / winner を
+	TicTacToe と同じ形で返すので、Agent.play にそのまま渡せる。
+	"""
+	def __init__(self, games, k):
+		self.__games = games
+		self.__k = k
+
+	@property
+	def size(self):
+		return self.__games.size
+
+	@property
+	def next(self):
+		return None if self.__games.done[self.__k] else self.__games.next
+
+	@property
+	def board(self):
+		return self.__games.board_of(self.__k)
+
+	@property
+	def code(self):
+		return int(self.__games.codes[self.__k])
+
+	@property
+	def empty_cells(self):
+		return np.flatnonzero(self.__games.board[self.__k].ravel() == 0).tolist()
+
+	@property
+	def cells(self):
+		return memoryview(self.__games.board[self.__k].reshape(-1)).toreadonly()
+
+	@property
+	def snapshot(self):
+		return self.__games.board[self.__k].tobytes()
+
+	@property
+	def count(self):
+		return int(np.count_nonzero(self.__games.board[self.__k]))
+
+	@property
+	def state(self):
+		return State(int(self.__games.state[self.__k]))
+
+	@property
+	def winner(self):
+		winner = int(self.__games.winner[self.__k])
+		return Player(winner) if winner else None
+
+
+def play_batch(games, player_x, player_o):
+	"""全局が終わるまで player_x (先手) と player_o (後手) の play_batch で進める
+
+	Returns:
+		(X の勝ち数, O の勝ち数, 引き分け数)
+	"""
+	while games.next is not None:
+		agent = player_x if games.next is Player.X else player_o
+		games.step(agent.play_batch(games))
+	x_wins = int((games.winner == Player.X.value).sum())
+	o_wins = int((games.winner == Player.O.value).sum())
+	return x_wins, o_wins, games.num_games - x_wins - o_wins
+
+
+if __name__ == "__main__":
+	from Agent_vs_Agent import RandomAgent
+
+	num_trials = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+	batch = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+	n = 3
+
+	x_wins = o_wins = draws = 0
+	start = time.perf_counter()
+	done = 0
+	while done < num_trials:
+		k = min(batch, num_trials - done)
+		games = BatchTicTacToe(n, k, seed=done)
+		x, o, d = play_batch(games, RandomAgent(), RandomAgent())
+		x_wins += x
+		o_wins += o
+		draws += d
+		done += k
+		print(f"{done}回完了...")
+	elapsed = time.perf_counter() - start
+
+	print("\n" + "="*50)
+	print(f"試行回数: {num_trials}回 ({elapsed:.2f} 秒)")
+	print("="*50)
+	print(f"Player X の勝利: {x_wins}回 ({x_wins/num_trials*100:.2f}%)")
+	print(f"Player O の勝利: {o_wins}回 ({o_wins/num_trials*100:.2f}%)")
+	print(f"引き分け: {draws}回 ({draws/num_trials*100:.2f}%)")
+	print("="*50)
@@ -3,100 +3,382 @@
 TicTacToe Q学習エージェント
 課題 #3: Q学習エージェントの実装とランダムエージェントとの対戦
 
-結果（各10万回対戦）:
+結果（各10万回対戦、3 ルールをプロセスプールで同時に実行、シードはルール1〜3 の順に 1, 2, 3）:
 ============================================================
 【対戦ルール1】先手:ランダム、後手:Q学習エージェント
-  - 最終結果: Q学習勝利: 72.65%, 引き分け: 13.18%, ランダム勝利: 14.16%
-  - 学習推移: 1万回目 60.2% → 5万回目 74.1% → 10万回目 75.3%
+  - 最終結果: Q学習勝利: 72.81%, 引き分け: 13.18%, ランダム勝利: 14.00%
+  - 学習推移: 1万回目 62.1% → 5万回目 73.7% → 10万回目 73.9%
   - 後手不利にも関わらず、学習により70%以上の勝率を達成
 
 【対戦ルール2】先手:Q学習エージェント、後手:ランダム
-  - 最終結果: Q学習勝利: 90.08%, 引き分け: 5.54%, ランダム勝利: 4.38%
-  - 学習推移: 1万回目 84.4% → 5万回目 90.3% → 10万回目 92.1%
+  - 最終結果: Q学習勝利: 90.30%, 引き分け: 5.22%, ランダム勝利: 4.48%
+  - 学習推移: 1万回目 85.0% → 5万回目 91.5% → 10万回目 92.6%
   - 先手の有利さ + 学習効果で90%以上の高勝率
 
 【対戦ルール3】勝者が次の対局で後手になる
-  - 最終結果: Q学習勝利: 73.87%, 引き分け: 12.46%, ランダム勝利: 13.68%
-  - 学習推移: 1万回目 63.5% → 5万回目 75.9% → 10万回目 76.2%
+  - 最終結果: Q学習勝利: 74.24%, 引き分け: 12.31%, ランダム勝利: 13.46%
+  - 学習推移: 1万回目 65.2% → 5万回目 76.1% → 10万回目 76.6%
   - 先手後手が入れ替わるため、両方の状況を学習
 ============================================================
 """
 
 from TicTacToe import TicTacToe, Player, State
 from Agent_vs_Agent import Agent, RandomAgent
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from queue import Empty
+import itertools
+import multiprocessing
+import os
 import random
+import sys
+
+try:
+    import numpy as np
+except ImportError:     # NumPy が無い環境では DenseQTable は使えない
+    np = None
+
+
+def _import_burute_force():
+    """4/burute_force.py (盤面の対称変換と局面の列挙) を import する"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '4')
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    import burute_force
+    return burute_force
+
+
+# 盤面サイズごとの対称変換の置換表のキャッシュ
+_symmetry_cache = {}
+
+
+def symmetry_tables(n):
+    """
+    n x n 盤面の 8 通りの対称変換 (4/burute_force.py の回転・反転) のセル番号の置換表
+    - perms[t][i]: 変換 t でセル i (x * n + y) が移る先のセル番号 (t = 0 は恒等変換)
+    - inverses[t]: perms[t] の逆置換
+    """
+    if n not in _symmetry_cache:
+        bf = _import_burute_force()
+        transforms = [lambda x, y, n: (x, y), bf.rotate_90, bf.rotate_180, bf.rotate_270,
+                      bf.flip_h, bf.flip_v, bf.flip_diag_main, bf.flip_diag_anti]
+        perms = []
+        inverses = []
+        for transform in transforms:
+            perm = [bf.xy_to_idx(*transform(*bf.idx_to_xy(i, n), n), n) for i in range(n * n)]
+            inverse = [0] * (n * n)
+            for i, j in enumerate(perm):
+                inverse[j] = i
+            perms.append(tuple(perm))
+            inverses.append(tuple(inverse))
+        _symmetry_cache[n] = (tuple(perms), tuple(inverses))
+    return _symmetry_cache[n]
+
+
+def enumerate_states(n, canonicalize=None):
+    """
+    先手 (X) から交互に打って現れうる石の配置の 3 進数コードを全て列挙する
+    - 手数ごとに 4/burute_force.py の iter_boards で列挙する (勝負がついた後の配置も含む)
+    - canonicalize (コード -> (正規化したコード, 変換)) を渡すと正規化したコードにまとめる
+    """
+    bf = _import_burute_force()
+    weights = [3 ** i for i in range(n * n)]
+    codes = {}
+    for move in range(n * n + 1):
+        for board in bf.iter_boards(n, (move + 1) // 2, move // 2):
+            code = sum(v * w for v, w in zip(board, weights))
+            if canonicalize:
+                code = canonicalize(code)[0]
+            codes[code] = None
+    return list(codes)
+
+
+class QTable:
+    """
+    Q値の表
+    - 状態 (盤面の 3 進数コード) ごとに、各セルの Q値を array('d') の 1 行で持つ
+    - 行動はセル番号 x * n + y
+    - 未登録の状態の Q値は全て 0
+    """
+
+    def __init__(self, num_actions):
+        self.num_actions = num_actions
+        self.rows = {}
+        self._zeros = array('d', bytes(8 * num_actions))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, state):
+        return state in self.rows
+
+    def get(self, state):
+        """state の行 (未登録なら None)"""
+        return self.rows.get(state)
+
+    def row(self, state):
+        """state の行 (未登録なら 0 で作って登録する)"""
+        row = self.rows.get(state)
+        if row is None:
+            row = self.rows[state] = array('d', self._zeros)
+        return row
+
+    def best(self, state, actions):
+        """actions の中で Q値が最大の行動 (同じQ値ならセル番号の小さいもの。actions の順序によらない)"""
+        row = self.rows.get(state)
+        if row is None:
+            return min(actions)
+        best_action = actions[0]
+        best_q = row[best_action]
+        for action in actions[1:]:
+            q = row[action]
+            if q > best_q or (q == best_q and action < best_action):
+                best_q = q
+                best_action = action
+        return best_action
+
+    def stack(self, states):
+        """states の行を積んだ (len(states), num_actions) の配列 (要 NumPy, 未登録の状態の行は 0)"""
+        zeros = self._zeros
+        data = bytearray().join([self.rows.get(state, zeros) for state in states])
+        return np.frombuffer(data, dtype=np.float64).reshape(len(states), self.num_actions)
+
+
+class DenseQTable:
+    """
+    全状態を先に列挙した密な Q値の表 (要 NumPy, 3x3 以下の盤面のみ)
+    - 状態コードごとに行番号を割り当て、Q値を (状態数, n * n) の 1 つの配列で持つ
+    - QTable と同じ get / row / best を持ち、get / row は配列の行 (ビュー) を返す
+    """
+
+    # 列挙できる盤面の最大サイズ (4x4 は 3 ** 16 近い配置を Python で列挙することになる)
+    max_size = 3
+
+    def __init__(self, n, canonicalize=None):
+        if np is None:
+            raise ImportError("DenseQTable には NumPy が必要です")
+        if n > self.max_size:
+            raise ValueError(f'DenseQTable supports boards up to '
+                             f'{self.max_size}x{self.max_size}, got {n}x{n}')
+        codes = enumerate_states(n, canonicalize)
+        self.num_actions = n * n
+        self.index = {code: i for i, code in enumerate(codes)}
+        self.values = np.zeros((len(codes), n * n))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, state):
+        return state in self.index
+
+    def get(self, state):
+        """state の行 (列挙していない状態なら None)"""
+        i = self.index.get(state)
+        return None if i is None else self.values[i]
+
+    def row(self, state):
+        """state の行 (列挙していない状態なら KeyError)"""
+        return self.values[self.index[state]]
+
+    def best(self, state, actions):
+        """actions の中で Q値が最大の行動 (同じQ値ならセル番号の小さいもの)"""
+        q = self.values[self.index[state], actions].tolist()
+        best_q = max(q)
+        return min(action for action, value in zip(actions, q) if value == best_q)
+
+    def stack(self, states):
+        """states の行を積んだ (len(states), num_actions) の配列 (コピー)"""
+        return self.values[[self.index[state] for state in states]]
+
+
+# 学習率・探索率のスケジュール
+# schedule(episode, visits) -> 値
+# - episode: これまでに学習した対局数
+# - visits: 学習率ではその (状態, 行動) を、探索率ではその状態を更新した回数
+
+class LinearDecay:
+    """start から episodes 局かけて end まで直線的に下げる"""
+
+    def __init__(self, start, end, episodes):
+        self.start = start
+        self.end = end
+        self.episodes = episodes
+
+    def __call__(self, episode, visits):
+        return self.start + (self.end - self.start) * min(1.0, episode / self.episodes)
+
+    def __repr__(self):
+        return f"LinearDecay({self.start}, {self.end}, {self.episodes})"
+
+
+class ExponentialDecay:
+    """1 局ごとに rate 倍する (minimum より下げない)"""
+
+    def __init__(self, start, rate, minimum=0.0):
+        self.start = start
+        self.rate = rate
+        self.minimum = minimum
+
+    def __call__(self, episode, visits):
+        return max(self.minimum, self.start * self.rate ** episode)
+
+    def __repr__(self):
+        return f"ExponentialDecay({self.start}, {self.rate}, {self.minimum})"
+
+
+class InverseVisitDecay:
+    """更新回数 n に対して start / (1 + n) ** power (minimum より下げない)"""
+
+    def __init__(self, start=1.0, power=1.0, minimum=0.0):
+        self.start = start
+        self.power = power
+        self.minimum = minimum
+
+    def __call__(self, episode, visits):
+        return max(self.minimum, self.start / (1 + visits) ** self.power)
+
+    def __repr__(self):
+        return f"InverseVisitDecay({self.start}, {self.power}, {self.minimum})"
 
 
 class QLearningAgent(Agent):
     """
     Q学習エージェント
-    - alpha: 学習率 (0 < alpha <= 1)
+    - alpha: 学習率 (0 < alpha <= 1)。数値か、LinearDecay などのスケジュール
     - gamma: 割引率 (0 <= gamma <= 1)
-    - epsilon: 探索率 (ε-greedy法)
+    - epsilon: 探索率 (ε-greedy法)。数値か、LinearDecay などのスケジュール
+    - size: 盤面サイズ
+    - symmetry: True なら回転・反転で同じになる盤面を 1 つの状態にまとめる
+    - dense: True なら全状態を列挙した DenseQTable を使う (要 NumPy)
     """
 
-    def __init__(self, alpha=0.3, gamma=0.9, epsilon=0.2):
-        self.q_table = {}
+    def __init__(self, alpha=0.3, gamma=0.9, epsilon=0.2, size=3, symmetry=False, dense=False):
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
+        self.episodes = 0  # 学習した対局数
+        # スケジュールを使うときだけ、状態ごとに各行動を更新した回数を数える
+        self.visits = {}
+        self._count_visits = callable(alpha) or callable(epsilon)
         self.history = []  # (state, action)の履歴を保存
+        self.batch_history = []  # play_batch 用の局ごとの履歴
+        self.symmetry = symmetry
+        if symmetry:
+            self._perms, self._inverses = symmetry_tables(size)
+            # 変換 t の後のセル番号ごとの重み 3 ** perms[t][i]
+            self._weights = [tuple(3 ** j for j in perm) for perm in self._perms]
+            self._canonical = {}  # 盤面コード -> (正規化したコード, 変換の番号)
+        if dense:
+            self.q_table = DenseQTable(size, self.canonicalize if symmetry else None)
+        else:
+            self.q_table = QTable(size * size)
 
-    def get_state_key(self, board):
-        """盤面をハッシュ可能なタプルに変換"""
-        return tuple(tuple(cell for cell in row) for row in board)
-
-    def get_available_actions(self, board):
-        """利用可能なアクション（空きマス）を取得"""
-        actions = []
-        n = len(board)
-        for x in range(n):
-            for y in range(n):
-                if board[x][y] == Player.EMPTY:
-                    actions.append((x, y))
-        return actions
+    def get_state_key(self, game):
+        """
+        盤面の状態キー (エンジンが一手ごとに更新している 3 進数コード)
+        - symmetry なら対称変換で正規化したコード
+        """
+        if self.symmetry:
+            return self.canonicalize(game.code)[0]
+        return game.code
+
+    def canonicalize(self, code):
+        """
+        盤面コードを、8 通りの対称変換のうちコードが最小になるものに正規化する
+        - 返り値: (正規化したコード, 変換の番号 t)
+        - 行動 a は perms[t][a] で正規化した盤面のセル番号になる
+        """
+        hit = self._canonical.get(code)
+        if hit is None:
+            cells = []  # (セル番号, 値) の空でないセル
+            rest = code
+            i = 0
+            while rest:
+                rest, value = divmod(rest, 3)
+                if value:
+                    cells.append((i, value))
+                i += 1
+            for t, weights in enumerate(self._weights):
+                transformed = sum(value * weights[i] for i, value in cells)
+                if hit is None or transformed < hit[0]:
+                    hit = (transformed, t)
+            self._canonical[code] = hit
+        return hit
+
+    def get_available_actions(self, game):
+        """利用可能なアクション（空きマスのセル番号 x * n + y）を取得"""
+        return list(game.empty_cells)
 
     def get_q_value(self, state, action):
         """Q値を取得（未登録なら0）"""
-        if state not in self.q_table:
+        row = self.q_table.get(state)
+        if row is None:
             return 0.0
-        return self.q_table[state].get(action, 0.0)
+        return row[action]
 
     def set_q_value(self, state, action, value):
         """Q値を設定"""
-        if state not in self.q_table:
-            self.q_table[state] = {}
-        self.q_table[state][action] = value
+        self.q_table.row(state)[action] = value
 
-    def play(self, board):
+    def play(self, game):
         """
-        次の手を決定
+        次の手 (x, y) を決定
         - epsilon の確率でランダムに探索
         - それ以外は最大Q値の行動を選択
         """
-        actions = self.get_available_actions(board)
+        actions = game.empty_cells  # エンジンが持つ空きセルのビュー (コピーしない)
         if not actions:
             return None
 
-        state = self.get_state_key(board)
+        if self.symmetry:
+            state, t = self.canonicalize(game.code)
+            action = self._choose(state, actions, self._perms[t], self._inverses[t])
+        else:
+            state = game.code
+            action = self._choose(state, actions)
+
+        return divmod(action, game.size)
 
+    def _choose(self, state, actions, perm=None, inverse=None):
+        """
+        ε-greedy で行動を選び、(state, 行動) を履歴に追加する
+        - perm / inverse: 正規化の置換とその逆 (履歴と Q値は正規化した盤面のセル番号で扱う)
+        - 返り値は元の盤面のセル番号
+        """
         # ε-greedy法
-        if random.random() < self.epsilon:
+        if random.random() < self.current_epsilon(state):
             action = random.choice(actions)
+            if perm:
+                action = perm[action]
+        elif perm:
+            action = self.best_action(state, [perm[a] for a in actions])
         else:
-            # 最大Q値の行動を選択（同じQ値なら最初に見つかったものを選択）
-            best_action = actions[0]
-            best_q = self.get_q_value(state, actions[0])
-            for action in actions[1:]:
-                q = self.get_q_value(state, action)
-                if q > best_q:
-                    best_q = q
-                    best_action = action
-            action = best_action
+            # 最大Q値の行動を選択（同じQ値ならセル番号の小さいものを選択）
+            action = self.best_action(state, actions)
 
         # 履歴に追加
         self.history.append((state, action))
-        return action
+        return inverse[action] if inverse else action
+
+    def best_action(self, state, actions):
+        """actions の中で Q値が最大の行動 (同じQ値ならセル番号の小さいもの)"""
+        return self.q_table.best(state, actions)
+
+    def current_epsilon(self, state):
+        """state での探索率"""
+        epsilon = self.epsilon
+        if callable(epsilon):
+            row = self.visits.get(state)
+            return epsilon(self.episodes, sum(row) if row else 0)
+        return epsilon
+
+    def current_alpha(self, state, action):
+        """(state, action) の学習率"""
+        alpha = self.alpha
+        if callable(alpha):
+            row = self.visits.get(state)
+            return alpha(self.episodes, row[action] if row else 0)
+        return alpha
 
     def update_from_result(self, reward):
         """
@@ -107,9 +389,15 @@ class QLearningAgent(Agent):
         next_max_q = 0.0
         for state, action in reversed(self.history):
             current_q = self.get_q_value(state, action)
+            alpha = self.current_alpha(state, action)
             # Q学習の更新式: Q(s,a) = Q(s,a) + α * (r + γ * max_a' Q(s',a') - Q(s,a))
-            new_q = current_q + self.alpha * (reward + self.gamma * next_max_q - current_q)
+            new_q = current_q + alpha * (reward + self.gamma * next_max_q - current_q)
             self.set_q_value(state, action, new_q)
+            if self._count_visits:
+                row = self.visits.get(state)
+                if row is None:
+                    row = self.visits[state] = array('l', [0]) * self.q_table.num_actions
+                row[action] += 1
 
             # 次の状態の最大Q値を現在の状態の行動のQ値に設定
             next_max_q = new_q
@@ -118,239 +406,439 @@ class QLearningAgent(Agent):
 
         # 履歴をクリア
         self.history = []
+        self.episodes += 1
 
     def clear_history(self):
         """履歴をクリア"""
         self.history = []
 
-
-def run_experiment_rule1(num_trials=100000, report_interval=10000):
-    """
-    対戦ルール1: 先手後手固定
-    先手:ランダムエージェント、後手:Q学習エージェント
-    """
-    print("=" * 60)
-    print("【対戦ルール1】先手:ランダム、後手:Q学習エージェント")
-    print("=" * 60)
-
-    n = 3
-    q_agent = QLearningAgent(alpha=0.3, gamma=0.9, epsilon=0.2)
-    random_agent = RandomAgent()
-
-    q_wins = 0
-    random_wins = 0
-    draws = 0
-
-    # 区間ごとの統計
-    interval_q_wins = 0
-    interval_random_wins = 0
-    interval_draws = 0
-
-    for trial in range(num_trials):
-        game = TicTacToe(n)
-        q_agent.clear_history()
-
-        while game.state == State.PLAYING:
-            if game.next == Player.X:
-                # 先手: ランダムエージェント
-                choice = random_agent.play(game.board)
-                if choice:
-                    game.play(Player.X, choice[0], choice[1])
+    def play_batch(self, games):
+        """
+        BatchTicTacToe の進行中の各局で ε-greedy に手を選ぶ
+        - 履歴は局ごとに batch_history[k] に保存する
+        - 選び方は play と同じ (同じQ値なら、Q 表でのセル番号 (symmetry なら正規化した盤面の
+          セル番号) が小さい手)。乱数の使い方は違うので、探索する手は play と一致しない
+        """
+        if len(self.batch_history) != games.num_games:
+            self.batch_history = [[] for _ in range(games.num_games)]
+        actions = [0] * games.num_games
+        legal = games.legal
+        codes = games.codes.tolist()
+        draws = games.rng.random(games.num_games).tolist()
+        random_actions = games.random_actions()
+
+        # 各局の状態 (symmetry なら正規化したコードと変換の番号)
+        active = games.active().tolist()
+        states = []
+        transforms = []
+        for k in active:
+            if self.symmetry:
+                state, t = self.canonicalize(codes[k])
             else:
-                # 後手: Q学習エージェント
-                choice = q_agent.play(game.board)
-                if choice:
-                    game.play(Player.O, choice[0], choice[1])
-
-        # 結果の記録と学習
-        if game.state == State.WON:
-            if game.winner == Player.O:
-                q_wins += 1
-                interval_q_wins += 1
-                q_agent.update_from_result(1.0)  # 勝利報酬
+                state, t = codes[k], 0
+            states.append(state)
+            transforms.append(t)
+
+        # 全局の行を 1 つの配列に集め、合法手以外を除いて一度に argmax
+        # (argmax は最初の最大値を返すので、同じQ値なら Q 表でのセル番号が小さい手になる)
+        q = self.q_table.stack(states)
+        mask = legal[active]
+        if self.symmetry:
+            # 正規化した盤面のセル c は、元の盤面のセル inverse[c]
+            mask = np.take_along_axis(mask, np.array(self._inverses)[transforms], axis=1)
+        q[~mask] = -np.inf
+        greedy = q.argmax(axis=1).tolist()
+
+        for i, k in enumerate(active):
+            state = states[i]
+            perm = inverse = None
+            if self.symmetry:
+                perm, inverse = self._perms[transforms[i]], self._inverses[transforms[i]]
+            if draws[k] < self.current_epsilon(state):
+                action = int(random_actions[k])
+                if perm:
+                    action = perm[action]
             else:
-                random_wins += 1
-                interval_random_wins += 1
-                q_agent.update_from_result(-1.0)  # 敗北ペナルティ
-        else:
-            draws += 1
-            interval_draws += 1
-            q_agent.update_from_result(0.2)  # 引き分けは小さな正の報酬
-
-        # 進捗表示
-        if (trial + 1) % report_interval == 0:
-            total = interval_q_wins + interval_random_wins + interval_draws
-            print(f"{trial + 1:>6}回: Q学習勝利={interval_q_wins/total*100:5.1f}%, "
-                  f"引き分け={interval_draws/total*100:5.1f}%, "
-                  f"ランダム勝利={interval_random_wins/total*100:5.1f}%")
-            interval_q_wins = 0
-            interval_random_wins = 0
-            interval_draws = 0
+                action = greedy[i]
+            self.batch_history[k].append((state, action))
+            actions[k] = inverse[action] if inverse else action
+        return actions
 
-    print("-" * 60)
-    print(f"最終結果 ({num_trials}回):")
-    print(f"  Q学習勝利: {q_wins}回 ({q_wins/num_trials*100:.2f}%)")
-    print(f"  引き分け: {draws}回 ({draws/num_trials*100:.2f}%)")
-    print(f"  ランダム勝利: {random_wins}回 ({random_wins/num_trials*100:.2f}%)")
-    print()
+    def update_batch_from_result(self, rewards):
+        """
+        バッチの全局が終わった後、局ごとの報酬 rewards[k] で順に update_from_result する
+        """
+        for history, reward in zip(self.batch_history, rewards):
+            if history:
+                self.history = history
+                self.update_from_result(reward)
+        self.batch_history = []
 
-    return q_wins, draws, random_wins
 
+# 席順の決め方: (前の局で Q学習が先手だったか, 前の局の結果) -> この局で Q学習が先手か
+# 結果は 1: Q学習勝利, 0: 引き分け, -1: 相手の勝利 (初戦は (True, None))
 
-def run_experiment_rule2(num_trials=100000, report_interval=10000):
-    """
-    対戦ルール2: 先手後手固定
-    先手:Q学習エージェント、後手:ランダムエージェント
-    """
-    print("=" * 60)
-    print("【対戦ルール2】先手:Q学習エージェント、後手:ランダム")
-    print("=" * 60)
+def seat_q_second(q_is_first, result):
+    """Q学習エージェントは常に後手"""
+    return False
 
-    n = 3
-    q_agent = QLearningAgent(alpha=0.3, gamma=0.9, epsilon=0.2)
-    random_agent = RandomAgent()
 
-    q_wins = 0
-    random_wins = 0
-    draws = 0
+def seat_q_first(q_is_first, result):
+    """Q学習エージェントは常に先手"""
+    return True
 
-    interval_q_wins = 0
-    interval_random_wins = 0
-    interval_draws = 0
 
-    for trial in range(num_trials):
-        game = TicTacToe(n)
-        q_agent.clear_history()
+def seat_winner_second(q_is_first, result):
+    """勝者が次の対局で後手になる (引き分けなら維持、初戦は Q学習が先手)"""
+    if not result:
+        return q_is_first
+    return result < 0
 
-        while game.state == State.PLAYING:
-            if game.next == Player.X:
-                # 先手: Q学習エージェント
-                choice = q_agent.play(game.board)
-                if choice:
-                    game.play(Player.X, choice[0], choice[1])
-            else:
-                # 後手: ランダムエージェント
-                choice = random_agent.play(game.board)
-                if choice:
-                    game.play(Player.O, choice[0], choice[1])
-
-        # 結果の記録と学習
-        if game.state == State.WON:
-            if game.winner == Player.X:
-                q_wins += 1
-                interval_q_wins += 1
-                q_agent.update_from_result(1.0)
-            else:
-                random_wins += 1
-                interval_random_wins += 1
-                q_agent.update_from_result(-1.0)
-        else:
-            draws += 1
-            interval_draws += 1
-            q_agent.update_from_result(0.2)
-
-        if (trial + 1) % report_interval == 0:
-            total = interval_q_wins + interval_random_wins + interval_draws
-            print(f"{trial + 1:>6}回: Q学習勝利={interval_q_wins/total*100:5.1f}%, "
-                  f"引き分け={interval_draws/total*100:5.1f}%, "
-                  f"ランダム勝利={interval_random_wins/total*100:5.1f}%")
-            interval_q_wins = 0
-            interval_random_wins = 0
-            interval_draws = 0
 
-    print("-" * 60)
-    print(f"最終結果 ({num_trials}回):")
-    print(f"  Q学習勝利: {q_wins}回 ({q_wins/num_trials*100:.2f}%)")
-    print(f"  引き分け: {draws}回 ({draws/num_trials*100:.2f}%)")
-    print(f"  ランダム勝利: {random_wins}回 ({random_wins/num_trials*100:.2f}%)")
-    print()
+SEATINGS = {
+    'q_second': seat_q_second,
+    'q_first': seat_q_first,
+    'winner_second': seat_winner_second,
+}
 
-    return q_wins, draws, random_wins
 
+def play_episode(q_agent, opponent, q_player, size=3):
+    """q_agent を q_player 側にして 1 局対戦し、結果 (1: Q学習勝利, 0: 引き分け, -1: 相手の勝利) を返す
 
-def run_experiment_rule3(num_trials=100000, report_interval=10000):
+    学習はしない (q_agent.history に手が残るので、呼び出し側で update_from_result する)。
     """
-    対戦ルール3: 勝者が次の対局で後手になる
-    初戦はQ学習エージェントが先手
+    game = TicTacToe(size)
+    while game.state == State.PLAYING:
+        agent = q_agent if game.next == q_player else opponent
+        choice = agent.play(game)
+        if choice:
+            game.play(game.next, choice[0], choice[1])
+    if game.state == State.DRAW:
+        return 0
+    return 1 if game.winner == q_player else -1
+
+
+class Experiment:
+    """
+    Q学習エージェントと相手エージェントの対戦実験の設定
+    - name: 表示名
+    - seating: 席順の決め方 (SEATINGS のキー)
+    - trials / report_interval: 対局数と、区間の集計を報告する間隔
+    - agent_params: QLearningAgent の引数 (alpha, gamma, epsilon, symmetry, dense)
+    - opponent: 相手エージェントのクラス (引数なしで作る)
+    - rewards: (勝ち, 引き分け, 負け) の報酬
+    - seed: 乱数シード (None なら random モジュールの状態をそのまま使う)
+    - plateau_window / plateau_tolerance: 早期終了の設定 (converged を参照。window が None なら打ち切らない)
+    - batch_size: 指定すると BatchTicTacToe で batch_size 局ずつ同時に対戦し、まとめて学習する
+      (要 NumPy。相手は play_batch を持つエージェント。_play_batches を参照)
     """
-    print("=" * 60)
-    print("【対戦ルール3】勝者が次の対局で後手になる")
-    print("=" * 60)
 
-    n = 3
-    q_agent = QLearningAgent(alpha=0.3, gamma=0.9, epsilon=0.2)
-    random_agent = RandomAgent()
+    def __init__(self, name, seating='q_second', trials=100000, report_interval=10000,
+                 agent_params=None, opponent=RandomAgent, rewards=(1.0, 0.2, -1.0),
+                 seed=None, size=3, plateau_window=None, plateau_tolerance=0.01, batch_size=None):
+        self.name = name
+        self.seating = seating
+        self.trials = trials
+        self.report_interval = report_interval
+        self.agent_params = dict(alpha=0.3, gamma=0.9, epsilon=0.2)
+        self.agent_params.update(agent_params or {})
+        self.opponent = opponent
+        self.rewards = rewards
+        self.seed = seed
+        self.size = size
+        self.plateau_window = plateau_window
+        self.plateau_tolerance = plateau_tolerance
+        self.batch_size = batch_size
+
+    def reward_table(self):
+        """結果 (1 / 0 / -1) から報酬を引く dict"""
+        return {1: self.rewards[0], 0: self.rewards[1], -1: self.rewards[2]}
+
+    def converged(self, rates):
+        """
+        区間ごとの勝率 rates の移動平均が頭打ちになったか
+        - 直近 plateau_window 区間の平均勝率と、その前の plateau_window 区間の平均勝率の差が
+          plateau_tolerance 以下なら頭打ちとみなす
+        """
+        w = self.plateau_window
+        if not w or len(rates) < 2 * w:
+            return False
+        return abs(sum(rates[-w:]) - sum(rates[-2 * w:-w])) / w <= self.plateau_tolerance
 
-    q_wins = 0
-    random_wins = 0
-    draws = 0
+    def run(self, report=None):
+        """
+        実験を実行して (Q学習勝利数, 引き分け数, 相手の勝利数) を返す
+        - report(experiment, trial, q_wins, draws, opponent_wins):
+          report_interval 局ごとに区間の集計を渡す (省略時は従来の形式で表示する)
+        - 勝率が頭打ちになれば trials より前に打ち切る (対局数は返り値の合計)
+        """
+        if self.seed is not None:
+            random.seed(self.seed)
+        if report is None:
+            print("=" * 60)
+            print(self.name)
+            print("=" * 60)
+            report = print_interval
+
+        q_agent = QLearningAgent(size=self.size, **self.agent_params)
+        opponent = self.opponent()
+        rewards = self.reward_table()
+        if self.batch_size:
+            results = self._play_batches(q_agent, opponent, rewards)
+        else:
+            results = self._play_games(q_agent, opponent, rewards)
 
-    interval_q_wins = 0
-    interval_random_wins = 0
-    interval_draws = 0
+        totals = {1: 0, 0: 0, -1: 0}
+        interval = {1: 0, 0: 0, -1: 0}
+        rates = []  # 区間ごとの勝率
 
-    # Q学習エージェントが先手かどうか (初戦は先手)
-    q_is_first = True
+        for trial, result in enumerate(results):
+            totals[result] += 1
+            interval[result] += 1
 
-    for trial in range(num_trials):
-        game = TicTacToe(n)
-        q_agent.clear_history()
+            if (trial + 1) % self.report_interval == 0:
+                report(self, trial + 1, interval[1], interval[0], interval[-1])
+                rates.append(interval[1] / self.report_interval)
+                interval = {1: 0, 0: 0, -1: 0}
+                if self.converged(rates):
+                    break
 
-        if q_is_first:
-            q_player = Player.X
-            random_player = Player.O
-        else:
-            q_player = Player.O
-            random_player = Player.X
-
-        while game.state == State.PLAYING:
-            if game.next == q_player:
-                choice = q_agent.play(game.board)
-                if choice:
-                    game.play(q_player, choice[0], choice[1])
-            else:
-                choice = random_agent.play(game.board)
-                if choice:
-                    game.play(random_player, choice[0], choice[1])
-
-        # 結果の記録と学習、次の先手後手の決定
-        if game.state == State.WON:
-            if game.winner == q_player:
-                q_wins += 1
-                interval_q_wins += 1
-                q_agent.update_from_result(1.0)
-                q_is_first = False  # Q学習が勝ったので次は後手
-            else:
-                random_wins += 1
-                interval_random_wins += 1
-                q_agent.update_from_result(-1.0)
-                q_is_first = True  # ランダムが勝ったのでQ学習は次は先手
-        else:
-            draws += 1
-            interval_draws += 1
-            q_agent.update_from_result(0.2)
-            # 引き分けの場合は先手後手を維持
-
-        if (trial + 1) % report_interval == 0:
-            total = interval_q_wins + interval_random_wins + interval_draws
-            print(f"{trial + 1:>6}回: Q学習勝利={interval_q_wins/total*100:5.1f}%, "
-                  f"引き分け={interval_draws/total*100:5.1f}%, "
-                  f"ランダム勝利={interval_random_wins/total*100:5.1f}%")
-            interval_q_wins = 0
-            interval_random_wins = 0
-            interval_draws = 0
+        return totals[1], totals[0], totals[-1]
+
+    def _play_games(self, q_agent, opponent, rewards):
+        """TicTacToe で 1 局ずつ対戦して学習し、各局の結果 (1 / 0 / -1) を順に返す"""
+        seating = SEATINGS[self.seating]
+        q_is_first = True
+        result = None
+
+        for _ in range(self.trials):
+            q_is_first = seating(q_is_first, result)
+            q_player = Player.X if q_is_first else Player.O
 
+            q_agent.clear_history()
+            result = play_episode(q_agent, opponent, q_player, self.size)
+            q_agent.update_from_result(rewards[result])
+            yield result
+
+    def _play_batches(self, q_agent, opponent, rewards):
+        """
+        BatchTicTacToe で batch_size 局ずつ同時に対戦して学習し、各局の結果を順に返す
+        - バッチの k 局目は前のバッチの k 局目の続きとして席順を決める
+          (Q学習が先手の局と後手の局は別の BatchTicTacToe で進める)
+        - Q 表の更新はバッチの対局が終わってからなので、学習の推移は 1 局ずつの場合と一致しない
+        """
+        from BatchTicTacToe import BatchTicTacToe, play_batch
+
+        seating = SEATINGS[self.seating]
+        rng = np.random.default_rng(self.seed)
+        slots = min(self.batch_size, self.trials)
+        q_is_first = [True] * slots
+        last = [None] * slots
+        played = 0
+
+        while played < self.trials:
+            k = min(slots, self.trials - played)
+            first = [seating(q_is_first[i], last[i]) for i in range(k)]
+            results = [0] * k
+            for is_first in (True, False):
+                batch = [i for i in range(k) if first[i] == is_first]
+                if not batch:
+                    continue
+                games = BatchTicTacToe(self.size, len(batch), seed=rng)
+                if is_first:
+                    play_batch(games, q_agent, opponent)
+                else:
+                    play_batch(games, opponent, q_agent)
+                q_value = Player.X.value if is_first else Player.O.value
+                outcomes = [0 if w == 0 else 1 if w == q_value else -1 for w in games.winner.tolist()]
+                q_agent.update_batch_from_result([rewards[r] for r in outcomes])
+                for i, r in zip(batch, outcomes):
+                    results[i] = r
+            q_is_first[:k] = first
+            last[:k] = results
+            played += k
+            yield from results
+
+
+def print_interval(experiment, trial, q_wins, draws, opponent_wins, prefix=""):
+    """区間の集計を 1 行で表示する"""
+    total = q_wins + draws + opponent_wins
+    print(f"{prefix}{trial:>6}回: Q学習勝利={q_wins/total*100:5.1f}%, "
+          f"引き分け={draws/total*100:5.1f}%, "
+          f"ランダム勝利={opponent_wins/total*100:5.1f}%")
+
+
+def print_result(experiment, result):
+    """実験の最終結果を表示する"""
+    q_wins, draws, opponent_wins = result
+    trials = q_wins + draws + opponent_wins
     print("-" * 60)
-    print(f"最終結果 ({num_trials}回):")
-    print(f"  Q学習勝利: {q_wins}回 ({q_wins/num_trials*100:.2f}%)")
-    print(f"  引き分け: {draws}回 ({draws/num_trials*100:.2f}%)")
-    print(f"  ランダム勝利: {random_wins}回 ({random_wins/num_trials*100:.2f}%)")
+    print(f"最終結果 ({trials}回):")
+    print(f"  Q学習勝利: {q_wins}回 ({q_wins/trials*100:.2f}%)")
+    print(f"  引き分け: {draws}回 ({draws/trials*100:.2f}%)")
+    print(f"  ランダム勝利: {opponent_wins}回 ({opponent_wins/trials*100:.2f}%)")
     print()
 
-    return q_wins, draws, random_wins
+
+def _run_queued(index, experiment, queue):
+    """ワーカー: 実験を実行し、区間の集計を (index, 集計) として queue に送る。最後に (index, None)"""
+    try:
+        return experiment.run(lambda exp, *stats: queue.put((index, stats)))
+    finally:
+        queue.put((index, None))
+
+
+def run_experiments(experiments, workers=None, report=None):
+    """
+    複数の実験をプロセスプールで同時に実行し、各実験の結果を experiments の順に返す
+    - 区間の集計は届いた順に report(experiment, trial, q_wins, draws, opponent_wins) に渡す
+      (省略時は実験名を付けて表示する)
+    - 失敗した実験があれば、まだ始まっていない実験を取り消してその例外を送出する
+      (pickle できない実験のようにワーカーで始まらなかった場合も含む)
+    """
+    if report is None:
+        report = lambda exp, *stats: print_interval(exp, *stats, prefix=f"[{exp.name}] ")
+
+    with multiprocessing.Manager() as manager:
+        queue = manager.Queue()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_queued, i, experiment, queue)
+                       for i, experiment in enumerate(experiments)]
+            running = len(futures)
+            while running:
+                # 終了の印 (index, None) はワーカーで始まった実験しか送らないので、Future も見る
+                for future in futures:
+                    if future.done() and future.exception() is not None:
+                        for other in futures:
+                            other.cancel()
+                        future.result()
+                try:
+                    index, stats = queue.get(timeout=0.5)
+                except Empty:
+                    continue
+                if stats is None:
+                    running -= 1
+                else:
+                    report(experiments[index], *stats)
+            return [future.result() for future in futures]
+
+
+# sweep で省略したパラメータの値
+SWEEP_DEFAULTS = dict(alpha=0.3, gamma=0.9, epsilon=0.2, draw_reward=0.2)
+
+
+def sweep(grid, seating='q_second', trials=100000, report_interval=2000,
+          plateau_window=3, plateau_tolerance=0.01, workers=None, seed=0, verbose=False):
+    """
+    alpha / gamma / epsilon / draw_reward のグリッドサーチ
+    - grid: {'alpha': [...], 'gamma': [...], ...} (省略したキーは SWEEP_DEFAULTS の値)
+    - 全ての組み合わせを run_experiments で同時に実行し、各設定は勝率が頭打ちになった時点で打ち切る
+    - 返り値: (パラメータの dict, 対局数, 直近 plateau_window 区間の平均勝率) のリスト (勝率の高い順)
+    """
+    keys = list(SWEEP_DEFAULTS)
+    experiments = []
+    settings = []
+    for values in itertools.product(*[grid.get(key, [SWEEP_DEFAULTS[key]]) for key in keys]):
+        params = dict(zip(keys, values))
+        name = " ".join(f"{key}={value}" for key, value in params.items())
+        experiments.append(Experiment(
+            name, seating, trials, report_interval,
+            agent_params=dict(alpha=params['alpha'], gamma=params['gamma'], epsilon=params['epsilon']),
+            rewards=(1.0, params['draw_reward'], -1.0), seed=seed,
+            plateau_window=plateau_window, plateau_tolerance=plateau_tolerance))
+        settings.append(params)
+
+    # 区間ごとの勝率を親プロセスで記録する (同じ名前の設定があっても混ざらないよう実験の番号で引く)
+    position = {id(experiment): i for i, experiment in enumerate(experiments)}
+    rates = [[] for _ in experiments]
+
+    def report(experiment, trial, q_wins, draws, opponent_wins):
+        rates[position[id(experiment)]].append(q_wins / (q_wins + draws + opponent_wins))
+        if verbose:
+            print_interval(experiment, trial, q_wins, draws, opponent_wins,
+                           prefix=f"[{experiment.name}] ")
+
+    results = run_experiments(experiments, workers, report)
+
+    summary = []
+    for i, (params, result) in enumerate(zip(settings, results)):
+        recent = rates[i][-plateau_window:]
+        win_rate = sum(recent) / len(recent) if recent else result[0] / sum(result)
+        summary.append((params, sum(result), win_rate))
+    summary.sort(key=lambda item: -item[2])
+    return summary
+
+
+RULE1 = "【対戦ルール1】先手:ランダム、後手:Q学習エージェント"
+RULE2 = "【対戦ルール2】先手:Q学習エージェント、後手:ランダム"
+RULE3 = "【対戦ルール3】勝者が次の対局で後手になる"
+
+
+def run_experiment_rule1(num_trials=100000, report_interval=10000, symmetry=False):
+    """
+    対戦ルール1: 先手後手固定
+    先手:ランダムエージェント、後手:Q学習エージェント
+    """
+    experiment = Experiment(RULE1, 'q_second', num_trials, report_interval,
+                            agent_params=dict(symmetry=symmetry))
+    result = experiment.run()
+    print_result(experiment, result)
+    return result
+
+
+def run_experiment_rule2(num_trials=100000, report_interval=10000, symmetry=False):
+    """
+    対戦ルール2: 先手後手固定
+    先手:Q学習エージェント、後手:ランダムエージェント
+    """
+    experiment = Experiment(RULE2, 'q_first', num_trials, report_interval,
+                            agent_params=dict(symmetry=symmetry))
+    result = experiment.run()
+    print_result(experiment, result)
+    return result
+
+
+def run_experiment_rule3(num_trials=100000, report_interval=10000, symmetry=False):
+    """
+    対戦ルール3: 勝者が次の対局で後手になる
+    初戦はQ学習エージェントが先手
+    """
+    experiment = Experiment(RULE3, 'winner_second', num_trials, report_interval,
+                            agent_params=dict(symmetry=symmetry))
+    result = experiment.run()
+    print_result(experiment, result)
+    return result
+
+
+def main_sweep():
+    """python Q_learning.py sweep: ルール1 でのグリッドサーチ"""
+    grid = {
+        'alpha': [0.1, 0.3, 0.5],
+        'gamma': [0.9, 0.99],
+        'epsilon': [0.1, 0.2],
+        'draw_reward': [0.2, 0.5],
+    }
+    num_trials = 100000
+    summary = sweep(grid, trials=num_trials)
+
+    print("=" * 60)
+    print("グリッドサーチ (ルール1, 勝率の高い順)")
+    print("=" * 60)
+    for params, played, win_rate in summary:
+        name = " ".join(f"{key}={value}" for key, value in params.items())
+        print(f"{name}: 勝率 {win_rate*100:5.1f}% ({played}/{num_trials}回で打ち切り)")
+    total = sum(played for _, played, _ in summary)
+    print("-" * 60)
+    print(f"対局数の合計: {total}回 (打ち切りなしなら {num_trials * len(summary)}回)")
 
 
 if __name__ == "__main__":
+    if sys.argv[1:] == ['sweep']:
+        main_sweep()
+        sys.exit()
+    # python Q_learning.py batch: BatchTicTacToe で 1000 局ずつまとめて対戦・学習する (要 NumPy)
+    batch_size = 1000 if sys.argv[1:] == ['batch'] else None
+
     print("\n" + "=" * 60)
     print("TicTacToe Q学習エージェント vs ランダムエージェント")
     print("各ルールで10万回対戦を行い、学習の推移を観察")
@@ -360,10 +848,19 @@ if __name__ == "__main__":
     num_trials = 100000
     report_interval = 10000
 
-    # 各ルールで実験を実行
-    run_experiment_rule1(num_trials, report_interval)
-    run_experiment_rule2(num_trials, report_interval)
-    run_experiment_rule3(num_trials, report_interval)
+    # 各ルールの実験をプロセスプールで同時に実行
+    experiments = [
+        Experiment(RULE1, 'q_second', num_trials, report_interval, seed=1, batch_size=batch_size),
+        Experiment(RULE2, 'q_first', num_trials, report_interval, seed=2, batch_size=batch_size),
+        Experiment(RULE3, 'winner_second', num_trials, report_interval, seed=3, batch_size=batch_size),
+    ]
+    results = run_experiments(experiments)
+
+    print()
+    for experiment, result in zip(experiments, results):
+        print("=" * 60)
+        print(experiment.name)
+        print_result(experiment, result)
 
     print("=" * 60)
     print("全ての実験が完了しました")
@@ -374,65 +871,79 @@ if __name__ == "__main__":
 ============================================================
 実行結果:
 
+区間の集計は実験名を [] で付けて、各ワーカーから届いた順に表示する
+(以下は 1 コアで実行したもの。複数コアでは 3 ルールの行が混ざって表示される)。
+最終結果は全ての実験が終わった後にまとめて表示する。
+
 【対戦ルール1】先手:ランダム、後手:Q学習エージェント
 ============================================================
- 10000回: Q学習勝利= 60.2%, 引き分け= 16.1%, ランダム勝利= 23.8%
- 20000回: Q学習勝利= 71.0%, 引き分け= 13.7%, ランダム勝利= 15.3%
- 30000回: Q学習勝利= 72.7%, 引き分け= 14.1%, ランダム勝利= 13.2%
- 40000回: Q学習勝利= 73.3%, 引き分け= 13.5%, ランダム勝利= 13.2%
- 50000回: Q学習勝利= 74.1%, 引き分け= 13.1%, ランダム勝利= 12.8%
- 60000回: Q学習勝利= 74.7%, 引き分け= 13.0%, ランダム勝利= 12.3%
- 70000回: Q学習勝利= 75.0%, 引き分け= 12.3%, ランダム勝利= 12.7%
- 80000回: Q学習勝利= 75.1%, 引き分け= 12.3%, ランダム勝利= 12.7%
- 90000回: Q学習勝利= 75.2%, 引き分け= 11.8%, ランダム勝利= 13.1%
-100000回: Q学習勝利= 75.3%, 引き分け= 12.0%, ランダム勝利= 12.7%
-最終結果: Q学習勝利: 72.65%, 引き分け: 13.18%, ランダム勝利: 14.16%
+[【対戦ルール1】先手:ランダム、後手:Q学習エージェント]  10000回: Q学習勝利= 62.1%, 引き分け= 15.6%, ランダム勝利= 22.4%
+[【対戦ルール1】先手:ランダム、後手:Q学習エージェント]  20000回: Q学習勝利= 71.7%, 引き分け= 14.0%, ランダム勝利= 14.3%
+[【対戦ルール1】先手:ランダム、後手:Q学習エージェント]  30000回: Q学習勝利= 74.6%, 引き分け= 12.5%, ランダム勝利= 12.9%
+[【対戦ルール1】先手:ランダム、後手:Q学習エージェント]  40000回: Q学習勝利= 74.4%, 引き分け= 12.7%, ランダム勝利= 12.9%
+[【対戦ルール1】先手:ランダム、後手:Q学習エージェント]  50000回: Q学習勝利= 73.7%, 引き分け= 13.0%, ランダム勝利= 13.4%
+[【対戦ルール1】先手:ランダム、後手:Q学習エージェント]  60000回: Q学習勝利= 74.3%, 引き分け= 13.1%, ランダム勝利= 12.6%
+[【対戦ルール1】先手:ランダム、後手:Q学習エージェント]  70000回: Q学習勝利= 74.7%, 引き分け= 12.5%, ランダム勝利= 12.8%
+[【対戦ルール1】先手:ランダム、後手:Q学習エージェント]  80000回: Q学習勝利= 75.1%, 引き分け= 12.4%, ランダム勝利= 12.5%
+[【対戦ルール1】先手:ランダム、後手:Q学習エージェント]  90000回: Q学習勝利= 73.8%, 引き分け= 13.1%, ランダム勝利= 13.1%
+[【対戦ルール1】先手:ランダム、後手:Q学習エージェント] 100000回: Q学習勝利= 73.9%, 引き分け= 12.9%, ランダム勝利= 13.1%
+最終結果 (100000回):
+  Q学習勝利: 72813回 (72.81%)
+  引き分け: 13185回 (13.18%)
+  ランダム勝利: 14002回 (14.00%)
 
 考察:
 - 後手は不利だが、Q学習により70%以上の勝率を達成
-- 学習初期は勝率60%程度だが、2万回目で71%に急上昇
-- 約5万回程度で収束傾向（75%前後で安定）
+- 学習初期は勝率60%程度だが、2万回目で72%に急上昇
+- 約4万回程度で収束傾向（74%前後で安定）
 
 ============================================================
 【対戦ルール2】先手:Q学習エージェント、後手:ランダム
 ============================================================
- 10000回: Q学習勝利= 84.4%, 引き分け=  7.8%, ランダム勝利=  7.7%
- 20000回: Q学習勝利= 88.6%, 引き分け=  6.2%, ランダム勝利=  5.2%
- 30000回: Q学習勝利= 89.6%, 引き分け=  5.9%, ランダム勝利=  4.5%
- 40000回: Q学習勝利= 90.7%, 引き分け=  5.4%, ランダム勝利=  3.8%
- 50000回: Q学習勝利= 90.3%, 引き分け=  5.5%, ランダム勝利=  4.2%
- 60000回: Q学習勝利= 91.2%, 引き分け=  5.2%, ランダム勝利=  3.6%
- 70000回: Q学習勝利= 91.2%, 引き分け=  5.3%, ランダム勝利=  3.6%
- 80000回: Q学習勝利= 91.2%, 引き分け=  4.9%, ランダム勝利=  3.9%
- 90000回: Q学習勝利= 91.5%, 引き分け=  4.8%, ランダム勝利=  3.7%
-100000回: Q学習勝利= 92.1%, 引き分け=  4.4%, ランダム勝利=  3.5%
-最終結果: Q学習勝利: 90.08%, 引き分け: 5.54%, ランダム勝利: 4.38%
+[【対戦ルール2】先手:Q学習エージェント、後手:ランダム]  10000回: Q学習勝利= 85.0%, 引き分け=  7.0%, ランダム勝利=  8.0%
+[【対戦ルール2】先手:Q学習エージェント、後手:ランダム]  20000回: Q学習勝利= 89.2%, 引き分け=  5.7%, ランダム勝利=  5.1%
+[【対戦ルール2】先手:Q学習エージェント、後手:ランダム]  30000回: Q学習勝利= 89.4%, 引き分け=  6.2%, ランダム勝利=  4.4%
+[【対戦ルール2】先手:Q学習エージェント、後手:ランダム]  40000回: Q学習勝利= 90.3%, 引き分け=  5.4%, ランダム勝利=  4.3%
+[【対戦ルール2】先手:Q学習エージェント、後手:ランダム]  50000回: Q学習勝利= 91.5%, 引き分け=  4.4%, ランダム勝利=  4.1%
+[【対戦ルール2】先手:Q学習エージェント、後手:ランダム]  60000回: Q学習勝利= 90.9%, 引き分け=  5.0%, ランダム勝利=  4.1%
+[【対戦ルール2】先手:Q学習エージェント、後手:ランダム]  70000回: Q学習勝利= 91.2%, 引き分け=  4.7%, ランダム勝利=  4.1%
+[【対戦ルール2】先手:Q学習エージェント、後手:ランダム]  80000回: Q学習勝利= 91.5%, 引き分け=  4.7%, ランダム勝利=  3.8%
+[【対戦ルール2】先手:Q学習エージェント、後手:ランダム]  90000回: Q学習勝利= 91.4%, 引き分け=  4.8%, ランダム勝利=  3.7%
+[【対戦ルール2】先手:Q学習エージェント、後手:ランダム] 100000回: Q学習勝利= 92.6%, 引き分け=  4.2%, ランダム勝利=  3.2%
+最終結果 (100000回):
+  Q学習勝利: 90299回 (90.30%)
+  引き分け: 5221回 (5.22%)
+  ランダム勝利: 4480回 (4.48%)
 
 考察:
 - 先手の有利さ + 学習効果で90%以上の高勝率
 - ランダムvs.ランダムの先手勝率(約58%)と比較して大幅に向上
-- 学習初期から84%と高い勝率を示し、さらに90%超まで向上
+- 学習初期から85%と高い勝率を示し、さらに90%超まで向上
 
 ============================================================
 【対戦ルール3】勝者が次の対局で後手になる
 ============================================================
- 10000回: Q学習勝利= 63.5%, 引き分け= 14.0%, ランダム勝利= 22.4%
- 20000回: Q学習勝利= 71.6%, 引き分け= 13.4%, ランダム勝利= 15.1%
- 30000回: Q学習勝利= 73.5%, 引き分け= 12.8%, ランダム勝利= 13.7%
- 40000回: Q学習勝利= 75.1%, 引き分け= 12.4%, ランダム勝利= 12.5%
- 50000回: Q学習勝利= 75.9%, 引き分け= 12.2%, ランダム勝利= 11.9%
- 60000回: Q学習勝利= 75.7%, 引き分け= 12.0%, ランダム勝利= 12.3%
- 70000回: Q学習勝利= 76.0%, 引き分け= 11.7%, ランダム勝利= 12.3%
- 80000回: Q学習勝利= 75.1%, 引き分け= 12.3%, ランダム勝利= 12.6%
- 90000回: Q学習勝利= 76.1%, 引き分け= 11.7%, ランダム勝利= 12.2%
-100000回: Q学習勝利= 76.2%, 引き分け= 12.0%, ランダム勝利= 11.8%
-最終結果: Q学習勝利: 73.87%, 引き分け: 12.46%, ランダム勝利: 13.68%
+[【対戦ルール3】勝者が次の対局で後手になる]  10000回: Q学習勝利= 65.2%, 引き分け= 13.5%, ランダム勝利= 21.2%
+[【対戦ルール3】勝者が次の対局で後手になる]  20000回: Q学習勝利= 71.7%, 引き分け= 13.5%, ランダム勝利= 14.7%
+[【対戦ルール3】勝者が次の対局で後手になる]  30000回: Q学習勝利= 73.9%, 引き分け= 13.0%, ランダム勝利= 13.1%
+[【対戦ルール3】勝者が次の対局で後手になる]  40000回: Q学習勝利= 75.2%, 引き分け= 11.8%, ランダム勝利= 12.9%
+[【対戦ルール3】勝者が次の対局で後手になる]  50000回: Q学習勝利= 76.1%, 引き分け= 12.1%, ランダム勝利= 11.8%
+[【対戦ルール3】勝者が次の対局で後手になる]  60000回: Q学習勝利= 76.7%, 引き分け= 11.3%, ランダム勝利= 12.0%
+[【対戦ルール3】勝者が次の対局で後手になる]  70000回: Q学習勝利= 75.3%, 引き分け= 12.4%, ランダム勝利= 12.4%
+[【対戦ルール3】勝者が次の対局で後手になる]  80000回: Q学習勝利= 75.4%, 引き分け= 12.0%, ランダム勝利= 12.5%
+[【対戦ルール3】勝者が次の対局で後手になる]  90000回: Q学習勝利= 76.1%, 引き分け= 12.1%, ランダム勝利= 11.8%
+[【対戦ルール3】勝者が次の対局で後手になる] 100000回: Q学習勝利= 76.6%, 引き分け= 11.2%, ランダム勝利= 12.2%
+最終結果 (100000回):
+  Q学習勝利: 74236回 (74.24%)
+  引き分け: 12306回 (12.31%)
+  ランダム勝利: 13458回 (13.46%)
 
 考察:
 - 先手後手両方の状況で学習できる
 - ルール1に近い結果（勝つと後手になるため）
 - 勝利すると後手になるため、後手での強さが重要
 - 5万回程度で76%前後に収束
+
 ============================================================
 
 総合考察:
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Q学習エージェントの並列学習
+
+ワーカープロセスが Q 表のスナップショットを持った QLearningAgent で
+ランダムエージェントと対局し、局ごとの (state, action) の履歴と報酬を返す。
+学習側は受け取った履歴を順に update_from_result で Q 表に反映し、
+各ワーカーが sync_interval 局打つごとに新しい Q 表をワーカーに配る。
+Q 表はラウンドごとに各ワーカーへ pickle して送るので、ラウンドの局数を
+ワーカー数に比例させて、1 局あたりの転送量がコア数で増えないようにしている。
+
+    python Q_learning_parallel.py [試行回数] [プロセス数]
+
+ラウンド内のワーカーは古い Q 表で手を選ぶので、学習の推移は
+Q_learning.py の逐次版と完全には一致しない。
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import random
+import sys
+import time
+
+from TicTacToe import Player
+from Q_learning import (QLearningAgent, Experiment, SEATINGS, RULE1, RULE2, RULE3,
+                        play_episode, print_interval, print_result)
+
+# 対戦ルールの番号ごとの (表示名, 席順の決め方)
+RULES = {
+    1: (RULE1, 'q_second'),
+    2: (RULE2, 'q_first'),
+    3: (RULE3, 'winner_second'),
+}
+
+
+def _play_shard(args):
+    """
+    ワーカー: Q 表のスナップショットで num_episodes 局対戦する
+    - seat: このワーカーの (前の局で Q学習が先手だったか, 前の局の結果)
+    - 返り値: ([(履歴, 結果), ...], 最後の局の seat)
+    """
+    q_table, played, visits, experiment, num_episodes, seat, seed = args
+    random.seed(seed)
+    # 手を選ぶだけなので、Q 表は学習側のスナップショットに差し替える (dense の列挙はしない)
+    params = experiment.agent_params
+    q_agent = QLearningAgent(epsilon=params['epsilon'], symmetry=params.get('symmetry', False),
+                             size=experiment.size)
+    q_agent.q_table = q_table
+    # 探索率のスケジュール用 (ラウンド中は学習しないので固定)
+    q_agent.episodes = played
+    q_agent.visits = visits
+    opponent = experiment.opponent()
+    seating = SEATINGS[experiment.seating]
+    q_is_first, result = seat
+
+    episodes = []
+    for _ in range(num_episodes):
+        q_is_first = seating(q_is_first, result)
+        q_player = Player.X if q_is_first else Player.O
+
+        q_agent.clear_history()
+        result = play_episode(q_agent, opponent, q_player, experiment.size)
+        episodes.append((q_agent.history, result))
+    return episodes, (q_is_first, result)
+
+
+def train_parallel(rule, num_trials=100000, workers=None, sync_interval=1000,
+                   report_interval=10000, seed=0, alpha=0.3, gamma=0.9, epsilon=0.2,
+                   symmetry=False, dense=False):
+    """
+    対戦ルール rule (1, 2, 3) で Q学習エージェントを並列に学習する
+    - 各ワーカーが sync_interval 局打つごと (ラウンドは sync_interval * workers 局) に、
+      各ワーカーの履歴を反映して Q 表を配り直す
+    - 乱数シードは seed から決まるので、同じ workers なら結果は再現する
+    - 席順・報酬・表示は Q_learning.py の Experiment と同じものを使う
+    - 返り値: (学習した QLearningAgent, (Q学習勝利数, 引き分け数, ランダム勝利数))
+    """
+    name, seating = RULES[rule]
+    experiment = Experiment(f"{name} (並列)", seating, num_trials, report_interval,
+                            agent_params=dict(alpha=alpha, gamma=gamma, epsilon=epsilon,
+                                              symmetry=symmetry, dense=dense),
+                            seed=seed)
+    print("=" * 60)
+    print(experiment.name)
+    print("=" * 60)
+
+    workers = workers or os.cpu_count()
+    q_agent = QLearningAgent(**experiment.agent_params)
+    rewards = experiment.reward_table()
+    master = random.Random(seed)
+    seats = [(True, None)] * workers  # ワーカーごとの (Q学習が先手だったか, 前の局の結果)
+
+    totals = {1: 0, 0: 0, -1: 0}
+    interval = {1: 0, 0: 0, -1: 0}
+    trial = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while trial < num_trials:
+            # このラウンドの局数をワーカーに振り分ける
+            size = min(sync_interval * workers, num_trials - trial)
+            shards = [size // workers + (i < size % workers) for i in range(workers)]
+            tasks = [(q_agent.q_table, q_agent.episodes, q_agent.visits, experiment,
+                      shards[i], seats[i], master.getrandbits(64)) for i in range(workers)]
+
+            # 学習側: ワーカーの順に履歴を反映する
+            for i, (episodes, seat) in enumerate(pool.map(_play_shard, tasks)):
+                seats[i] = seat
+                for history, result in episodes:
+                    q_agent.history = history
+                    q_agent.update_from_result(rewards[result])
+                    totals[result] += 1
+                    interval[result] += 1
+                    trial += 1
+
+                    if trial % report_interval == 0:
+                        print_interval(experiment, trial, interval[1], interval[0], interval[-1])
+                        interval = {1: 0, 0: 0, -1: 0}
+
+    result = totals[1], totals[0], totals[-1]
+    print_result(experiment, result)
+    return q_agent, result
+
+
+if __name__ == "__main__":
+    num_trials = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    for rule in (1, 2, 3):
+        start = time.perf_counter()
+        train_parallel(rule, num_trials, workers)
+        print(f"({workers} プロセス, {time.perf_counter() - start:.1f} 秒)")
+        print()
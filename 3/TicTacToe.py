@@ -1,4 +1,5 @@
 from enum import Enum, auto
+from array import array
 import random
 
 class Player(Enum):
@@ -16,14 +17,91 @@ class State(Enum):
 	DRAW = 1
 	WON = 2
 
-class TicTacToe:
+class _MoveRecord:
+	"""打った手のスタック・3 進数コード・空きセル・cells を一手ごとに更新する記録 (TicTacToe 用)
+
+	サブクラスは石を置いたら _push を、一手を取り消すときは _pop を呼ぶ。
+	BitboardTicTacToe は一手を軽くするため、これらを 2 つのビットボードから必要なときに作る。
+	"""
 	def __init__(self, size):
+		# 打った手のセル番号 (x * size + y) のスタック
+		self.__moves = []
+		# 盤面の 3 進数コード (code_weights を参照)
+		self.__weights = code_weights(size)
+		self.__code = 0
+		# 空きセルの配列 (先頭の size * size - 手数 個が空きセル) と、各セルの配列内の位置
+		self.__empty = array('i', range(size * size))
+		self.__where = array('i', range(size * size))
+		# セル番号ごとの Player の値を並べた盤面と、その bytes のキャッシュ
+		self.__cells = bytearray(size * size)
+		self.__snapshot = None
+
+	@property
+	def moves(self):
+		"""これまでに打った手のセル番号 (x * size + y) のリスト"""
+		return self.__moves
+
+	@property
+	def code(self):
+		"""盤面の 3 進数コード (state_code(board) と同じ値を一手ごとに更新する)"""
+		return self.__code
+
+	@property
+	def cells(self):
+		"""盤面 (セル番号 x * size + y ごとの Player の値) の読み取り専用ビュー。盤面の変化がそのまま見える"""
+		return memoryview(self.__cells).toreadonly()
+
+	@property
+	def snapshot(self):
+		"""現在の盤面の bytes (不変でハッシュ可能)。次に盤面が変わるまで同じオブジェクトを返す"""
+		if self.__snapshot is None:
+			self.__snapshot = bytes(self.__cells)
+		return self.__snapshot
+
+	@property
+	def empty_cells(self):
+		"""空きセルのセル番号 (x * size + y) の読み取り専用ビュー (順序は不定)"""
+		return memoryview(self.__empty).toreadonly()[:len(self.__cells) - len(self.__moves)]
+
+	def _push(self, player, idx):
+		"""player がセル idx に置いた手を記録する"""
+		# 空きセルの配列から swap-remove で取り除く (末尾に置いておくと undo で戻せる)
+		last = len(self.__cells) - len(self.__moves) - 1
+		i = self.__where[idx]
+		moved = self.__empty[last]
+		self.__empty[i] = moved
+		self.__where[moved] = i
+		self.__empty[last] = idx
+		self.__where[idx] = last
+		self.__moves.append(idx)
+		self.__code += player.value * self.__weights[idx]
+		self.__cells[idx] = player.value
+		self.__snapshot = None
+
+	def _pop(self):
+		"""最後の一手の記録を取り消し、そのセル番号を返す"""
+		idx = self.__moves.pop()	# 取り消したセルは空きセルの配列の末尾にあるので、これで空きに戻る
+		self.__code -= self.__cells[idx] * self.__weights[idx]
+		self.__cells[idx] = 0
+		self.__snapshot = None
+		return idx
+
+class TicTacToe(_MoveRecord):
+	def __init__(self, size, early_draw=False):
+		super().__init__(size)
 		self.__size = size
 		self.__next = Player.X
 		self.__board = [[Player.EMPTY] * size for _ in range(size)]
 		self.__state = State.PLAYING
 		self.__winner = None
 		self.__count = 0
+		# ラインごとの各プレイヤーの石の数 (ラインの番号は line_table と同じ)
+		self.__cell_lines = line_table(size)[1]
+		self.__line_counts = {Player.X: [0] * (2 * size + 2),
+							  Player.O: [0] * (2 * size + 2)}
+		# early_draw なら、全ラインに両者の石が入った時点で引き分けにする
+		self.__early_draw = early_draw
+		self.__blocked = 0
 
 	@property
 	def size(self):
@@ -35,6 +113,7 @@ class TicTacToe:
 
 	@property
 	def board(self):
+		"""盤面のリストのリスト (内部の盤面そのものなので変更しないこと。表のキーには snapshot を使う)"""
 		return self.__board
 
 	@property
@@ -59,46 +138,314 @@ class TicTacToe:
 		if not self.state == State.PLAYING:
 			return False
 		self.__board[x][y] = player
+		idx = x * self.__size + y
 		if self.__next == Player.X:
 			self.__next = Player.O
 		elif self.__next == Player.O:
 			self.__next = Player.X
 		self.__count += 1
+		self._push(player, idx)
 		self.check_winner(x, y)
 		return True
 
+	def undo(self):
+		"""最後の一手を取り消す。取り消す手が無ければ False"""
+		if not self.moves:
+			return False
+		n = self.size
+		idx = self._pop()
+		x, y = divmod(idx, n)
+		player = self.__board[x][y]
+		counts = self.__line_counts[player]
+		others = self.__line_counts[Player.O if player == Player.X else Player.X]
+		for l in self.__cell_lines[idx]:
+			if counts[l] == 1 and others[l]:
+				self.__blocked -= 1
+			counts[l] -= 1
+		self.__board[x][y] = Player.EMPTY
+		self.__count -= 1
+		self.__next = player
+		self.__state = State.PLAYING
+		self.__winner = None
+		return True
+
 	def check_winner(self, x, y):
+		"""(x, y) に置いた後の判定。置いたセルを通るラインの石の数だけを更新する"""
 		player = self.__board[x][y]
 		n = self.size
-		if all(self.__board[x][c] == player for c in range(n)):
+		counts = self.__line_counts[player]
+		others = self.__line_counts[Player.O if player == Player.X else Player.X]
+		won = False
+		for l in self.__cell_lines[x * n + y]:
+			counts[l] += 1
+			if counts[l] == n:
+				won = True
+			elif counts[l] == 1 and others[l]:
+				self.__blocked += 1
+		if won:
 			self.__winner = player
 			self.__state = State.WON
 			self.__next = None
 			return player
-		if all(self.__board[r][y] == player for r in range(n)):
+		if self.__count == n * n or (self.__early_draw and self.__blocked == 2 * n + 2):
+			self.__state = State.DRAW
+			self.__next = None
+			return 0
+		
+	def print_board(self):
+		for row in self.__board:
+			print(' '.join(str(cell) for cell in row))
+
+
+# 盤面サイズごとのライン情報のキャッシュ
+_lines_cache = {}
+
+def line_table(n):
+	"""n x n 盤面のライン (各行・各列・2本の対角線) の情報を返す。
+
+	Returns:
+		masks: 各ラインに含まれるセルのビットマスク (セル (x, y) は bit x * n + y)
+		cell_lines: 各セルを通るラインの番号のタプル (セル番号 x * n + y で引く)
+	"""
+	if n not in _lines_cache:
+		cells = []
+		for x in range(n):
+			cells.append([x * n + y for y in range(n)])
+		for y in range(n):
+			cells.append([x * n + y for x in range(n)])
+		cells.append([i * n + i for i in range(n)])
+		cells.append([i * n + (n - 1 - i) for i in range(n)])
+		masks = tuple(sum(1 << idx for idx in line) for line in cells)
+		# セル (x, y) は行 x・列 n + y と、x == y なら対角線 2n、x + y == n - 1 なら対角線 2n + 1 を通る
+		cell_lines = []
+		for x in range(n):
+			for y in range(n):
+				lines = [x, n + y]
+				if x == y:
+					lines.append(2 * n)
+				if x + y == n - 1:
+					lines.append(2 * n + 1)
+				cell_lines.append(tuple(lines))
+		cell_lines = tuple(cell_lines)
+		_lines_cache[n] = (masks, cell_lines)
+	return _lines_cache[n]
+
+# 盤面サイズごとの 3 進数コードの重みのキャッシュ
+_weights_cache = {}
+
+def code_weights(n):
+	"""セル番号 x * n + y ごとの重み 3 ** (x * n + y) のタプル
+
+	盤面のコードは「各セルの Player の値 (0: 空, 1: X, 2: O) × 重み」の和で、
+	盤面と 1 対 1 に対応する整数になる。
+	"""
+	if n not in _weights_cache:
+		_weights_cache[n] = tuple(3 ** idx for idx in range(n * n))
+	return _weights_cache[n]
+
+def state_code(board):
+	"""リストのリストの盤面から 3 進数コードを計算する"""
+	n = len(board)
+	weights = code_weights(n)
+	return sum(cell.value * weights[x * n + y]
+			   for x, row in enumerate(board) for y, cell in enumerate(row))
+
+class BitboardTicTacToe:
+	"""ビットボード版 TicTacToe
+
+	TicTacToe と同じ size / next / board / state / winner / count / play を持つ。
+	各プレイヤーの石を整数のビット (セル (x, y) は bit x * n + y) で持ち、
+	勝敗は置いたセルを通るラインのマスクとの比較だけで判定する。
+	大量の対局をシミュレーションする用途向け。
+	early_draw (デフォルト True) なら、全ラインに両者の石が入り
+	どちらも勝てなくなった時点で引き分けにする。
+	一手で更新するのはビットボードと手のスタックだけで、code / cells / snapshot / empty_cells は
+	参照されたときにビットボードから作り、次に盤面が変わるまでキャッシュする。
+	"""
+	def __init__(self, size, early_draw=True):
+		self.__size = size
+		self.__next = Player.X
+		self.__x_bits = 0
+		self.__o_bits = 0
+		self.__state = State.PLAYING
+		self.__winner = None
+		self.__count = 0
+		self.__masks, self.__cell_lines = line_table(size)
+		self.__early_draw = early_draw
+		self.__blocked = 0
+		# 打った手のセル番号 (x * size + y) のスタック
+		self.__moves = []
+		# ビットボードから作った [code, cells, 空きセル, snapshot] (盤面が変わったら None)
+		self.__record = None
+
+	@property
+	def size(self):
+		return self.__size
+
+	@property
+	def next(self):
+		return self.__next
+
+	@property
+	def board(self):
+		"""盤面を TicTacToe.board と同じリストのリストにして返す (呼ぶたびに作る)"""
+		n = self.__size
+		x_bits = self.__x_bits
+		o_bits = self.__o_bits
+		board = [[Player.EMPTY] * n for _ in range(n)]
+		for idx in range(n * n):
+			if x_bits >> idx & 1:
+				board[idx // n][idx % n] = Player.X
+			elif o_bits >> idx & 1:
+				board[idx // n][idx % n] = Player.O
+		return board
+
+	@property
+	def bits(self):
+		"""(X の石のビット, O の石のビット)"""
+		return self.__x_bits, self.__o_bits
+
+	@property
+	def moves(self):
+		"""これまでに打った手のセル番号 (x * size + y) のリスト"""
+		return self.__moves
+
+	@property
+	def code(self):
+		"""盤面の 3 進数コード (state_code(board) と同じ値)"""
+		return self.__derive()[0]
+
+	@property
+	def cells(self):
+		"""盤面 (セル番号 x * size + y ごとの Player の値) の読み取り専用ビュー
+
+		盤面が変わると作り直すので、TicTacToe.cells と違い古いビューには次の手が反映されない。
+		"""
+		return memoryview(self.__derive()[1]).toreadonly()
+
+	@property
+	def snapshot(self):
+		"""現在の盤面の bytes (不変でハッシュ可能)。次に盤面が変わるまで同じオブジェクトを返す"""
+		record = self.__derive()
+		if record[3] is None:
+			record[3] = bytes(record[1])
+		return record[3]
+
+	@property
+	def empty_cells(self):
+		"""空きセルのセル番号 (x * size + y) の読み取り専用ビュー (小さい順)"""
+		return memoryview(self.__derive()[2]).toreadonly()
+
+	def __derive(self):
+		"""code / cells / 空きセルを 2 つのビットボードから作る (次に盤面が変わるまでキャッシュ)"""
+		if self.__record is None:
+			n = self.__size
+			weights = code_weights(n)
+			cells = bytearray(n * n)
+			code = 0
+			for value, bits in ((Player.X.value, self.__x_bits), (Player.O.value, self.__o_bits)):
+				# 立っているビットだけを下から順にたどる
+				while bits:
+					low = bits & -bits
+					idx = low.bit_length() - 1
+					cells[idx] = value
+					code += value * weights[idx]
+					bits ^= low
+			empty = array('i', [idx for idx, value in enumerate(cells) if not value])
+			self.__record = [code, cells, empty, None]
+		return self.__record
+
+	@property
+	def state(self):
+		return self.__state
+
+	@property
+	def winner(self):
+		return self.__winner
+
+	@property
+	def count(self):
+		return self.__count
+
+	def play(self, player, x, y):
+		n = self.__size
+		if not (0 <= x < n) or not (0 <= y < n):
+			return False
+		idx = x * n + y
+		bit = 1 << idx
+		if (self.__x_bits | self.__o_bits) & bit:
+			return False
+		if not player == self.__next:
+			return False
+		if not self.__state == State.PLAYING:
+			return False
+		if player is Player.X:
+			self.__x_bits |= bit
+			self.__next = Player.O
+		else:
+			self.__o_bits |= bit
+			self.__next = Player.X
+		self.__count += 1
+		self.__moves.append(idx)
+		self.__record = None
+		self.check_winner(player, idx)
+		return True
+
+	def undo(self):
+		"""最後の一手を取り消す。取り消す手が無ければ False"""
+		if not self.__moves:
+			return False
+		idx = self.__moves.pop()
+		self.__record = None
+		bit = 1 << idx
+		if self.__x_bits & bit:
+			player = Player.X
+			bits, others = self.__x_bits, self.__o_bits
+		else:
+			player = Player.O
+			bits, others = self.__o_bits, self.__x_bits
+		masks = self.__masks
+		for l in self.__cell_lines[idx]:
+			if bits & masks[l] == bit and others & masks[l]:
+				self.__blocked -= 1
+		if player is Player.X:
+			self.__x_bits ^= bit
+		else:
+			self.__o_bits ^= bit
+		self.__count -= 1
+		self.__next = player
+		self.__state = State.PLAYING
+		self.__winner = None
+		return True
+
+	def check_winner(self, player, idx):
+		"""player がセル idx に置いた後の判定"""
+		if player is Player.X:
+			bits, others = self.__x_bits, self.__o_bits
+		else:
+			bits, others = self.__o_bits, self.__x_bits
+		masks = self.__masks
+		bit = 1 << idx
+		won = False
+		for l in self.__cell_lines[idx]:
+			mask = masks[l]
+			if bits & mask == mask:
+				won = True
+			elif bits & mask == bit and others & mask:	# このラインは今ふさがった
+				self.__blocked += 1
+		if won:
 			self.__winner = player
 			self.__state = State.WON
 			self.__next = None
 			return player
-		if x == y:
-			if all(self.__board[i][i] == player for i in range(n)):
-				self.__winner = player
-				self.__state = State.WON
-				self.__next = None
-				return player
-		if x + y == n - 1:
-			if all(self.__board[i][n - i - 1] == player for i in range(n)):
-				self.__winner = player
-				self.__state = State.WON
-				self.__next = None
-				return player
-		if self.__count == n * n:
+		n = self.__size
+		if self.__count == n * n or (self.__early_draw and self.__blocked == 2 * n + 2):
 			self.__state = State.DRAW
 			self.__next = None
 			return 0
-		
+
 	def print_board(self):
-		for row in self.__board:
+		for row in self.board:
 			print(' '.join(str(cell) for cell in row))
 			
 		
@@ -108,13 +455,10 @@ if __name__ == "__main__":
 	for i in range(n * n):
 		if game.state != State.PLAYING:
 			break
-		while True:
-			x = random.randint(0, n - 1)
-			y = random.randint(0, n - 1)
-			current_player = game.next
-			if game.play(current_player, x, y):
-				print(f"Player {current_player}'s turn ({x}, {y})")
-				break
+		x, y = divmod(random.choice(game.empty_cells), n)
+		current_player = game.next
+		game.play(current_player, x, y)
+		print(f"Player {current_player}'s turn ({x}, {y})")
 		game.print_board()
 		print("-----")
 
@@ -55,10 +55,9 @@ def canonical(board, n):
 	return min(all_transforms)
 
 
-def count_patterns(n, num_o, num_x):
-	"""○がnum_o個、×がnum_x個の局面のユニークパターン数を数える"""
+def iter_boards(n, num_o, num_x):
+	"""○がnum_o個、×がnum_x個の局面 (○: 1, ×: 2 のタプル) を全て列挙する"""
 	positions = list(range(n * n))
-	unique = set()
 
 	for o_positions in combinations(positions, num_o):
 		remaining = [p for p in positions if p not in o_positions]
@@ -68,8 +67,15 @@ def count_patterns(n, num_o, num_x):
 				board[p] = 1
 			for p in x_positions:
 				board[p] = 2
-			board = tuple(board)
-			unique.add(canonical(board, n))
+			yield tuple(board)
+
+
+def count_patterns(n, num_o, num_x):
+	"""○がnum_o個、×がnum_x個の局面のユニークパターン数を数える"""
+	unique = set()
+
+	for board in iter_boards(n, num_o, num_x):
+		unique.add(canonical(board, n))
 
 	return len(unique)
 
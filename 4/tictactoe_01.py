@@ -16,7 +16,7 @@ class TicTacToe:
 	Attributes:
 		  size (int)      : ボードサイズ
 		  next (Player)   : 次のプレイヤーID
-		 board (list)     : ボードの状態
+		board (memoryview): ボードの状態 (セル x + y * size の値の読み取り専用ビュー。コピーは bytes(board))
 		 state (GameState): ゲームの状態
 		winner (Player)   : 勝者のプレイヤーID（勝負があった場合）
 		 judge (dict)     : 判定結果
@@ -91,12 +91,43 @@ class TicTacToe:
 	def __init__(self, n:int=3):
 		self.__size   = n
 		self.__next   = self.Player.FIRST
-		self.__board  = [self.CellState.EMPTY for _ in range(self.size * self.size)]
+		self.__board  = bytearray(self.size * self.size)	# CellState の値 (EMPTY = 0)
 		self.__state  = self.GameState.ONGOING
 		self.__winner = None
 		self.__judge  = { self.Direction.COLUMN:   [self.LineState.PENDING] * self.size,
 						  self.Direction.ROW:      [self.LineState.PENDING] * self.size,
 						  self.Direction.DIAGONAL: [self.LineState.PENDING, self.LineState.PENDING]}
+		# 各ラインの石の数 [s1, s2] (judge と同じ形) と、引き分けになったラインの数
+		self.__counts = { direction: [[0, 0] for _ in lines] for direction, lines in self.__judge.items() }
+		self.__n_draw = 0
+		self.__cell_lines = self._line_table(n)
+	
+	# 盤面サイズごとの、各セルを通るラインの表
+	_line_tables = {}
+	
+	@classmethod
+	def _line_table(cls, n:int):
+		"""	各セルを通るラインの表を返す。盤面サイズごとに一度だけ作る。
+		
+		Args:
+			n: ボードサイズ
+		Returns:
+			セルのインデックス (x + y * n) ごとの、通るラインの (Direction, POS) のタプル
+		Raises:
+			None
+		"""
+		if n not in cls._line_tables:
+			table = []
+			for idx in range(n * n):
+				x, y = idx % n, idx // n
+				lines = [(cls.Direction.COLUMN, x), (cls.Direction.ROW, y)]
+				if x == y:
+					lines.append((cls.Direction.DIAGONAL, cls.Diagonal.TL2BR))
+				if x + y == n - 1:
+					lines.append((cls.Direction.DIAGONAL, cls.Diagonal.TR2BL))
+				table.append(tuple(lines))
+			cls._line_tables[n] = tuple(table)
+		return cls._line_tables[n]
 	
 	@property
 	def size(self):
@@ -120,9 +151,10 @@ class TicTacToe:
 	def board(self):
 		"""	ボードの状態を返す。
 			0: 空, Player.FIRST, Player.SECOND はそれぞれのプレイヤーが選択したセル
-			ここでは整数に置換して返す。
+			整数の並びの読み取り専用ビューを返す (コピーしないので、盤面の変化がそのまま見える)。
+			固定した盤面が必要なら bytes(game.board) などでコピーする。
 		"""
-		return [int(cell) for cell in self.__board]
+		return memoryview(self.__board).toreadonly()
 		
 	@board.setter
 	def board(self, *args):
@@ -207,7 +239,7 @@ class TicTacToe:
 		self.__board[x + y * self.size] = self.CellState(player)
 		
 		# 判定
-		ret = self._judge()
+		ret = self._judge(x + y * self.size)
 		
 		# ゲームの状態の更新
 		if self.state == self.GameState.ONGOING:
@@ -232,9 +264,9 @@ class TicTacToe:
 			x %= self.size
 		
 		if self.state == self.GameState.ONGOING:
-			return self.board[x + y * self.size] == self.CellState.EMPTY
+			return self.__board[x + y * self.size] == self.CellState.EMPTY
 		else:
-			False
+			return False
 	
 	def print_board(self, stat:bool=False):
 		""" 現在の盤面の状態をターミナルに出力する。
@@ -269,12 +301,13 @@ class TicTacToe:
 		print(hdiv)
 		print()
 	
-	def _judge(self):
-		"""	現在の盤面の状態を評価し判定する。
+	def _judge(self, idx:int):
+		"""	セル idx に石を置いた後の盤面を評価し判定する。
 		play() から呼びだされ、結果は judge, state, winner に保存されるため、明示的に呼び出す必要は無い。
+		idx を通るラインの石の数だけを更新するので、一手あたりの判定はボードサイズによらない。
 		
 		Args:
-			None
+			idx: 石を置いたセルのインデックス (左上が 0)
 		Returns:
 			ゲームの状態と勝者 ID (勝敗が決した場合)
 		Raises:
@@ -282,92 +315,25 @@ class TicTacToe:
 		"""
 		
 		if self.state == self.GameState.ONGOING:	# ゲーム終了後は判定しない
-			# 各方向のチェック用にサブルーチンを定義
-			def check_linestate_hz(direction:self.Direction):
-				"""	水平/垂直方向のチェック用サブルーチン。結果は judge に保存される。
-				
-				Args:
-					direction: 方向。Direction.COLUMN or Direction.ROW
-				Returns:
-					None
-				Raises:
-					None
-				"""
-				for p0 in range(self.size):
-					if self.judge[direction][p0] == self.LineState.PENDING:
-						s1 = s2 = 0
-						
-						for p1 in range(self.size):
-							if direction == self.Direction.COLUMN:
-								x = p0;	y = p1
-							else:			   # Direction.ROW
-								x = p1;	y = p0
-							
-							c = self.board[x + y * self.size]
-							if   c == self.CellState.FIRST:  s1 += 1
-							elif c == self.CellState.SECOND: s2 += 1
-						
-						if s1 and s2:
-							self.__judge[direction][p0] = self.LineState.DRAW
-						elif s1 == self.size:
-							self.__judge[direction][p0] = self.LineState.FIXED
-							self.__state = self.GameState.OVER
-							self.__winner = self.Player.FIRST
-						elif s2 == self.size:
-							self.__judge[direction][p0] = self.LineState.FIXED
-							self.__state = self.GameState.OVER
-							self.__winner = self.Player.SECOND
+			player = self.__board[idx]
 			
-			# 斜め方向のチェック用サブルーチン
-			def check_linestate_x(direction:self.Diagonal):
-				"""	斜め方向のチェック用サブルーチン。結果は judge に保存される。
-				
-				Args:
-					direction: 方向。Diagonal.TL2BR or Diagonal.TR2BL
-				Returns:
-					None
-				Raises:
-					None
-				"""
-				if self.judge[self.Direction.DIAGONAL][direction] == self.LineState.PENDING:
-					s1 = s2 = 0
-				
-					for x in range(self.size):
-						if direction == self.Diagonal.TL2BR:
-							y = x
-						else:			   # Diagonal.TR2BL
-							y = self.size - x - 1
-						
-						c = self.board[x + y * self.size]
-						if   c == self.CellState.FIRST:  s1 += 1
-						elif c == self.CellState.SECOND: s2 += 1
+			for direction, pos in self.__cell_lines[idx]:
+				count = self.__counts[direction][pos]
+				count[player - 1] += 1
 				
+				if self.judge[direction][pos] == self.LineState.PENDING:
+					s1, s2 = count
 					if s1 and s2:
-						self.__judge[self.Direction.DIAGONAL][direction] = self.LineState.DRAW
-					elif s1 == self.size:
-						self.__judge[self.Direction.DIAGONAL][direction] = self.LineState.FIXED
+						self.__judge[direction][pos] = self.LineState.DRAW
+						self.__n_draw += 1
+					elif s1 == self.size or s2 == self.size:
+						self.__judge[direction][pos] = self.LineState.FIXED
 						self.__state = self.GameState.OVER
-						self.__winner = self.Player.FIRST
-					elif s2 == self.size:
-						self.__judge[self.Direction.DIAGONAL][direction] = self.LineState.FIXED
-						self.__state = self.GameState.OVER
-						self.__winner = self.Player.SECOND
-			
-			
-			# 各方向のチェック
-			check_linestate_hz(self.Direction.COLUMN)
-			check_linestate_hz(self.Direction.ROW)
-			check_linestate_x(self.Diagonal.TL2BR)
-			check_linestate_x(self.Diagonal.TR2BL)
+						self.__winner = self.Player(player)
 			
 			# 引き分けのチェック - 全てのラインが引き分けなら、ゲームも引き分け
-			if  self.judge[self.Direction.DIAGONAL][self.Diagonal.TL2BR] == self.LineState.DRAW \
-			and self.judge[self.Direction.DIAGONAL][self.Diagonal.TR2BL] == self.LineState.DRAW:
-				for p in range(self.size):
-					if self.judge[self.Direction.COLUMN][p] != self.LineState.DRAW:	break
-					if self.judge[self.Direction.ROW   ][p] != self.LineState.DRAW:	break
-				else:
-					self.__state = self.GameState.DRAW
+			if self.__n_draw == 2 * self.size + 2:
+				self.__state = self.GameState.DRAW
 		
 		return self.__state, self.__winner
 
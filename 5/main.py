@@ -30,7 +30,7 @@ def main():
     x = [[1.0, 2.0, 3.0]]
     y = net.predict(x)
     print(f"入力: {x[0]}")
-    print(f"出力: {y[0]}")
+    print(f"出力: {[float(v) for v in y[0]]}")
     print()
 
     # 層数を変えてみる: 4層ネットワーク
@@ -43,7 +43,7 @@ def main():
     x2 = [[0.5, -0.5]]
     y2 = net2.predict(x2)
     print(f"入力: {x2[0]}")
-    print(f"出力: {y2[0]}")
+    print(f"出力: {[float(v) for v in y2[0]]}")
     print()
 
     # 活性化関数を変えてみる
@@ -59,8 +59,8 @@ def main():
     y_relu = net_relu.predict(x3)
 
     print(f"入力:    {x3[0]}")
-    print(f"Sigmoid: {[round(v, 4) for v in y_sigmoid[0]]}")
-    print(f"ReLU:    {[round(v, 4) for v in y_relu[0]]}")
+    print(f"Sigmoid: {[round(float(v), 4) for v in y_sigmoid[0]]}")
+    print(f"ReLU:    {[round(float(v), 4) for v in y_relu[0]]}")
 
 
 if __name__ == "__main__":
@@ -2,41 +2,71 @@
 import random
 import math
 
+try:
+    import numpy as np
+except ImportError:     # NumPy が無い環境では純 Python 実装を使う
+    np = None
 
-def mat_mul(A, B):
-    """行列積 A @ B"""
-    rows_A = len(A)
-    cols_A = len(A[0])
-    cols_B = len(B[0])
-
-    result = [[0.0] * cols_B for _ in range(rows_A)]
-    for i in range(rows_A):
-        for j in range(cols_B):
-            for k in range(cols_A):
-                result[i][j] += A[i][k] * B[k][j]
-    return result
-
-
-def mat_add(A, B):
-    """行列和 (ブロードキャスト対応)"""
-    rows_A = len(A)
-    cols_A = len(A[0])
-    rows_B = len(B)
-
-    result = [[0.0] * cols_A for _ in range(rows_A)]
-    for i in range(rows_A):
-        bi = i if rows_B > 1 else 0
-        for j in range(cols_A):
-            result[i][j] = A[i][j] + B[bi][j]
-    return result
-
-
-def apply_func(mat, f):
-    """各要素に関数を適用"""
-    rows = len(mat)
-    cols = len(mat[0])
-    result = [[0.0] * cols for _ in range(rows)]
-    for i in range(rows):
-        for j in range(cols):
-            result[i][j] = f(mat[i][j])
-    return result
+
+if np is not None:
+    # NumPy 版: 行列は連続した float64 の ndarray として扱う。
+    # リストのリストを渡されても自動で変換するので、呼び出し側は変更不要。
+
+    def _asarray(A):
+        """ndarray (float64, 連続領域) に変換。既に ndarray ならコピーしない"""
+        return np.ascontiguousarray(A, dtype=np.float64)
+
+    def mat_mul(A, B):
+        """行列積 A @ B"""
+        return np.matmul(_asarray(A), _asarray(B))
+
+    def mat_add(A, B):
+        """行列和 (ブロードキャスト対応)"""
+        return np.add(_asarray(A), _asarray(B))
+
+    def apply_func(mat, f):
+        """各要素に関数を適用
+
+        np.vectorize は要素ごとに f を Python で呼ぶので、純 Python 版と速さは変わらない
+        (NumPy で速くなるのは mat_mul / mat_add)。
+        """
+        return np.vectorize(f, otypes=[np.float64])(_asarray(mat))
+
+else:
+    # 純 Python 版: 行列はリストのリスト
+
+    def mat_mul(A, B):
+        """行列積 A @ B"""
+        rows_A = len(A)
+        cols_A = len(A[0])
+        cols_B = len(B[0])
+
+        result = [[0.0] * cols_B for _ in range(rows_A)]
+        for i in range(rows_A):
+            for j in range(cols_B):
+                for k in range(cols_A):
+                    result[i][j] += A[i][k] * B[k][j]
+        return result
+
+    def mat_add(A, B):
+        """行列和 (ブロードキャスト対応)"""
+        rows_A = len(A)
+        cols_A = len(A[0])
+        rows_B = len(B)
+
+        result = [[0.0] * cols_A for _ in range(rows_A)]
+        for i in range(rows_A):
+            bi = i if rows_B > 1 else 0
+            for j in range(cols_A):
+                result[i][j] = A[i][j] + B[bi][j]
+        return result
+
+    def apply_func(mat, f):
+        """各要素に関数を適用"""
+        rows = len(mat)
+        cols = len(mat[0])
+        result = [[0.0] * cols for _ in range(rows)]
+        for i in range(rows):
+            for j in range(cols):
+                result[i][j] = f(mat[i][j])
+        return result
@@ -1,36 +1,119 @@
 #!/usr/bin/env python3
-import math
-from matrix import apply_func
+"""
+活性化関数
 
+どの活性化関数も行列全体をまとめて処理する (matrix のバッチ版カーネルを使う)。
+導関数 deriv は順伝播の出力 y から計算するので、逆伝播のために活性化前の値
+z を残しておく必要はない。
 
-class Sigmoid:
-    def __call__(self, x):
-        def sigmoid(v):
-            if v < -500:
-                return 0.0
-            if v > 500:
-                return 1.0
-            return 1.0 / (1.0 + math.exp(-v))
-        return apply_func(x, sigmoid)
+kernel : Dense の融合カーネル (matrix.dense_forward) で使う名前 (無ければ None)
+needs_z: 逆伝播で活性化前の値 z が必要か (True なら deriv には y の代わりに z を渡す)
+"""
+from matrix import (mat_copy, mat_hadamard, ones, shape, apply_func,
+                    sigmoid, sigmoid_deriv, relu, relu_deriv, tanh, tanh_deriv,
+                    leaky_relu, leaky_relu_deriv, softmax, softmax_backward)
 
-    def deriv(self, y):
+
+class Activation:
+    """活性化関数の基底クラス"""
+    kernel = None
+    needs_z = False
+
+    def __call__(self, x, out=None):
+        raise NotImplementedError
+
+    def deriv(self, y, out=None):
+        """導関数 dy/dx (出力 y から)"""
+        raise NotImplementedError
+
+    def backward(self, y, dL_dy, out=None, z=None):
+        """逆伝播: 出力側の勾配 dL/dy から入力側の勾配 dL/dx を求める
+
+        needs_z なら導関数は活性化前の値 z から計算する。
+        """
+        return mat_hadamard(dL_dy, self.deriv(z if self.needs_z else y, out), out)
+
+
+class Sigmoid(Activation):
+    kernel = 'sigmoid'
+
+    def __call__(self, x, out=None):
+        return sigmoid(x, out)
+
+    def deriv(self, y, out=None):
         # y = sigmoid(x) として、導関数は y * (1 - y)
-        return apply_func(y, lambda v: v * (1 - v))
+        return sigmoid_deriv(y, out)
+
+
+class ReLU(Activation):
+    kernel = 'relu'
+
+    def __call__(self, x, out=None):
+        return relu(x, out)
+
+    def deriv(self, y, out=None):
+        # x > 0 と y = relu(x) > 0 は同値なので、出力 y から計算できる
+        return relu_deriv(y, out)
+
+
+class Tanh(Activation):
+    kernel = 'tanh'
+
+    def __call__(self, x, out=None):
+        return tanh(x, out)
+
+    def deriv(self, y, out=None):
+        # y = tanh(x) として、導関数は 1 - y^2
+        return tanh_deriv(y, out)
+
+
+class LeakyReLU(Activation):
+    def __init__(self, alpha=0.01):
+        # 負の側の傾き (0 < alpha)
+        self.alpha = alpha
+
+    def __call__(self, x, out=None):
+        return leaky_relu(x, self.alpha, out)
+
+    def deriv(self, y, out=None):
+        # alpha > 0 なら x > 0 と y > 0 は同値
+        return leaky_relu_deriv(y, self.alpha, out)
+
+
+class Softmax(Activation):
+    """行ごとのソフトマックス (出力層用)
+
+    出力の各要素が入力の全要素に依存するため、要素ごとの導関数 deriv は
+    定義せず、backward でヤコビ行列を掛けた結果を直接求める。
+    """
+
+    def __call__(self, x, out=None):
+        return softmax(x, out)
+
+    def deriv(self, y, out=None):
+        raise NotImplementedError('Softmax has no element-wise derivative; '
+                                  'use backward(y, dL_dy) instead')
 
+    def backward(self, y, dL_dy, out=None, z=None):
+        return softmax_backward(y, dL_dy, out)
 
-class ReLU:
-    def __call__(self, x):
-        return apply_func(x, lambda v: max(0.0, v))
 
-    def deriv(self, x):
-        return apply_func(x, lambda v: 1.0 if v > 0 else 0.0)
+class Linear(Activation):
+    kernel = 'linear'
 
+    def __call__(self, x, out=None):
+        if out is None:
+            return x
+        return mat_copy(x, out)
 
-class Linear:
-    def __call__(self, x):
-        return x
+    def deriv(self, x, out=None):
+        if out is None:
+            rows, cols = shape(x)
+            return ones(rows, cols)
+        return apply_func(x, lambda v: 1.0, out)
 
-    def deriv(self, x):
-        rows = len(x)
-        cols = len(x[0])
-        return [[1.0] * cols for _ in range(rows)]
+    def backward(self, y, dL_dy, out=None, z=None):
+        # 導関数は 1 なので勾配はそのまま
+        if out is None:
+            return dL_dy
+        return mat_copy(dL_dy, out)
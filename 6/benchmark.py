@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+行列バックエンドの速度比較
+
+同じ乱数シードで同じ構成のネットワークを作り、バックエンドごとに
+predict にかかる時間を計測する。続けて、現在のバックエンドで 1 つの
+ネットワークを複数スレッドから同時に predict したときのスループットを
+ワーカー数ごとに計測する。
+
+    python benchmark.py [入力次元] [中間層のユニット数] [バッチサイズ]
+"""
+
+import sys
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import matrix
+from network import Network
+from layers import Dense
+from activations import Sigmoid, ReLU
+
+
+def build_network(n_in, n_hidden, n_out, seed=0):
+    """乱数シードを固定して同じ重みのネットワークを作る"""
+    random.seed(seed)
+    net = Network()
+    net.add(Dense(n_in, n_hidden, ReLU()))
+    net.add(Dense(n_hidden, n_hidden, Sigmoid()))
+    net.add(Dense(n_hidden, n_out))
+    return net
+
+
+def time_predict(net, x, repeat=3):
+    """predict の最短実行時間 (秒) と出力"""
+    best = float('inf')
+    y = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        y = net.predict(x)
+        best = min(best, time.perf_counter() - start)
+    return best, y
+
+
+def bench_threads(net, x, workers=(1, 2, 4, 8), requests=64):
+    """1 つのネットワークをスレッドプールで共有したときの predict/秒
+
+    各リクエストの出力が単独で計算した結果と一致することも確認する。
+    """
+    expected = matrix.tolist(net.predict(x))
+    results = []
+    for n in workers:
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            start = time.perf_counter()
+            outputs = list(pool.map(net.predict, [x] * requests))
+            elapsed = time.perf_counter() - start
+        ok = all(matrix.tolist(y) == expected for y in outputs)
+        results.append((n, requests / elapsed, ok))
+    return results
+
+
+def main():
+    n_in = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    n_hidden = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    batch = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    n_out = 10
+
+    random.seed(1)
+    x = [[random.uniform(-1, 1) for _ in range(n_in)] for _ in range(batch)]
+
+    default = matrix.get_backend().name
+    print(f"=== {n_in} -> {n_hidden} -> {n_hidden} -> {n_out}, バッチ {batch} ===")
+    reference = None
+    for name in matrix.available_backends():
+        matrix.set_backend(name)
+        net = build_network(n_in, n_hidden, n_out)
+        elapsed, y = time_predict(net, matrix.asmatrix(x))
+        y = matrix.tolist(y)
+        if reference is None:
+            reference = y
+        diff = max(abs(a - b) for ra, rb in zip(y, reference)
+                   for a, b in zip(ra, rb))
+        print(f"{name:>8}: {elapsed * 1000:10.3f} ms  (最大誤差 {diff:.2e})")
+
+    # スレッド数を変えて同じネットワークを共有
+    matrix.set_backend(default)
+    net = build_network(n_in, n_hidden, n_out)
+    print()
+    print(f"=== スレッド並列 ({default}) ===")
+    base = None
+    for workers, throughput, ok in bench_threads(net, matrix.asmatrix(x)):
+        base = base or throughput
+        print(f"{workers:>3} スレッド: {throughput:10.1f} 回/秒  "
+              f"(x{throughput / base:.2f}, 結果一致: {ok})")
+
+
+if __name__ == "__main__":
+    main()
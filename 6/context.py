@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+順伝播・逆伝播の途中経過を保持するコンテキスト
+
+層 (Dense) 自身は重みなどのパラメータしか持たず、逆伝播に必要な入力・出力や
+作業用バッファは呼び出しごとの Context に保存する。そのため 1 つの Network を
+複数のスレッドから同時に使っても互いの状態を壊さない。
+同じ Context を使い回せば、ミニバッチ間で作業用バッファも使い回される。
+"""
+from matrix import zeros, shape, get_backend
+
+
+class LayerState:
+    """1 つの層の途中経過
+
+    Attributes:
+        x: 層への入力
+        z: 活性化前の値 (活性化関数が必要とする場合のみ)
+        y: 層の出力
+       dW: 重みの勾配 (逆伝播後)
+       db: バイアスの勾配 (逆伝播後)
+    """
+    __slots__ = ('x', 'z', 'y', 'dW', 'db', '_buffers')
+
+    def __init__(self):
+        self.x = None
+        self.z = None
+        self.y = None
+        self.dW = None
+        self.db = None
+        self._buffers = {}
+
+    def buffer(self, name, rows, cols):
+        """作業用の行列を返す。形状かバックエンドが変わったときだけ確保し直す"""
+        key = (name, get_backend().name)
+        buf = self._buffers.get(key)
+        if buf is None or tuple(shape(buf)) != (rows, cols):
+            buf = zeros(rows, cols)
+            self._buffers[key] = buf
+        return buf
+
+
+class Context:
+    """ネットワーク全体の途中経過 (層ごとの LayerState)"""
+
+    def __init__(self):
+        self._states = {}
+
+    def __getitem__(self, layer):
+        """layer の LayerState (無ければ作る)"""
+        state = self._states.get(id(layer))
+        if state is None:
+            state = self._states[id(layer)] = LayerState()
+        return state
@@ -1,25 +1,87 @@
 #!/usr/bin/env python3
 import random
-from matrix import mat_mul, mat_add
+from matrix import (mat_mul, mat_add_inplace, mat_hadamard, mat_transpose,
+                    mat_col_sum, dense_forward, asmatrix, shape)
 from activations import Linear
 
 
 class Dense:
     def __init__(self, n_in, n_out, activation=None):
         # ウェイト: 小さいランダム値で初期化
-        self.W = [[random.gauss(0, 0.01) for _ in range(n_out)]
-                  for _ in range(n_in)]
+        self.W = asmatrix([[random.gauss(0, 0.01) for _ in range(n_out)]
+                           for _ in range(n_in)])
         # バイアス: 0で初期化
-        self.b = [[0.0] * n_out]
+        self.b = asmatrix([[0.0] * n_out])
         # 活性化関数
         self.act = activation if activation else Linear()
 
-    def forward(self, x):
+    def forward(self, x, ctx=None):
+        """順伝播
+
+        ctx (Context) を渡すと、逆伝播用の入力・出力をそこに保存し、
+        作業用バッファもそこから借りる。ctx が無ければ推論として何も保存せず、
+        出力は新しい行列として返す。層自身の状態は変更しない。
+        """
+        kernel = getattr(self.act, 'kernel', None)
+        if ctx is None:
+            if kernel is None:
+                z = mat_add_inplace(mat_mul(x, self.W), self.b)
+                return self.act(z)
+            return dense_forward(x, self.W, self.b, kernel)
+
+        state = ctx[self]
+        rows, _ = shape(x)
+        _, n_out = shape(self.W)
         # バックプロパゲーション用に保存
-        self.x = x
-        self.z = mat_add(mat_mul(x, self.W), self.b)
-        self.y = self.act(self.z)
-        return self.y
-    
-    def backward(self, DL_dy):
-        dL_dz = dL_dy @ act.deriv(z)
\ No newline at end of file
+        state.x = x
+        if kernel is None:
+            # 融合カーネルの無い活性化関数: 行列積, バイアス, 活性化を順に計算
+            state.z = mat_mul(x, self.W, out=state.buffer('z', rows, n_out))
+            mat_add_inplace(state.z, self.b)
+            state.y = self.act(state.z, out=state.buffer('y', rows, n_out))
+            return state.y
+        # act(x @ W + b) を 1 回で計算。z は逆伝播で必要な場合だけ残す
+        if getattr(self.act, 'needs_z', True):
+            state.z = state.buffer('z', rows, n_out)
+        else:
+            state.z = None
+        state.y = dense_forward(x, self.W, self.b, kernel,
+                                out=state.buffer('y', rows, n_out),
+                                z_out=state.z)
+        return state.y
+
+    def backward(self, dL_dy, ctx):
+        """逆伝播
+
+        ctx に保存した順伝播の途中経過から、重み・バイアスの勾配
+        (ctx[self].dW, ctx[self].db) を求め、入力側の勾配 dL/dx を返す。
+        """
+        state = ctx[self]
+        rows, n_out = shape(dL_dy)
+        n_in, _ = shape(self.W)
+
+        # dL/dz = dL/dy * act'(z)
+        dz = state.buffer('dz', rows, n_out)
+        if hasattr(self.act, 'backward'):
+            dL_dz = self.act.backward(state.y, dL_dy, out=dz, z=state.z)
+        else:
+            needs_z = getattr(self.act, 'needs_z', True)
+            deriv = self.act.deriv(state.z if needs_z else state.y)
+            dL_dz = mat_hadamard(dL_dy, deriv, out=dz)
+
+        # dL/dW = x^T @ dL/dz, dL/db = dL/dz の列和
+        state.dW = mat_mul(mat_transpose(state.x), dL_dz,
+                           out=state.buffer('dW', n_in, n_out))
+        state.db = mat_col_sum(dL_dz, out=state.buffer('db', 1, n_out))
+        # dL/dx = dL/dz @ W^T
+        return mat_mul(dL_dz, mat_transpose(self.W),
+                       out=state.buffer('dx', rows, n_in))
+
+    def params(self):
+        """学習するパラメータ [W, b]"""
+        return [self.W, self.b]
+
+    def grads(self, ctx):
+        """backward で求めた勾配 [dW, db] (params と同じ順)"""
+        state = ctx[self]
+        return [state.dW, state.db]
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+損失関数
+
+y はネットワークの出力、t は教師データ (どちらも バッチサイズ x 出力次元)。
+__call__ はバッチ平均の損失 (float)、deriv は y による微分 dL/dy を返す。
+"""
+from matrix import (mat_sub, mat_hadamard, mat_sum, scalar_mul_inplace,
+                    cross_entropy, cross_entropy_deriv, shape)
+
+
+class MeanSquaredError:
+    """二乗和誤差 L = 1/N * sum(1/2 * (y - t)^2)"""
+
+    def __call__(self, y, t):
+        rows, _ = shape(y)
+        diff = mat_sub(y, t)
+        return 0.5 * mat_sum(mat_hadamard(diff, diff, diff)) / rows
+
+    def deriv(self, y, t, out=None):
+        # dL/dy = (y - t) / N
+        rows, _ = shape(y)
+        return scalar_mul_inplace(mat_sub(y, t, out), 1.0 / rows)
+
+
+class CrossEntropy:
+    """交差エントロピー誤差 L = -1/N * sum(t * log(y)) (Softmax と組み合わせる)"""
+
+    def __init__(self, eps=1e-12):
+        # log(0) を避けるための微小値
+        self.eps = eps
+
+    def __call__(self, y, t):
+        rows, _ = shape(y)
+        return cross_entropy(y, t, self.eps) / rows
+
+    def deriv(self, y, t, out=None):
+        # dL/dy = -t / y / N
+        rows, _ = shape(y)
+        d = cross_entropy_deriv(y, t, self.eps, out)
+        return scalar_mul_inplace(d, 1.0 / rows)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+XOR をミニバッチ学習する例
+
+実行結果:
+=== XOR の学習 (バッチサイズ 16, Adam) ===
+エポック   1: 損失 = 0.128617
+エポック  10: 損失 = 0.016864
+エポック  50: 損失 = 0.000381
+エポック 100: 損失 = 0.000128
+エポック 200: 損失 = 0.000041
+
+=== 学習後の出力 ===
+入力: [0.0, 0.0]  正解: 0.0  出力: 0.0033
+入力: [0.0, 1.0]  正解: 1.0  出力: 0.9886
+入力: [1.0, 0.0]  正解: 1.0  出力: 0.9912
+入力: [1.0, 1.0]  正解: 0.0  出力: 0.0105
+"""
+
+import random
+
+from matrix import asmatrix, tolist
+from network import Network
+from layers import Dense
+from activations import Tanh, Sigmoid
+from losses import MeanSquaredError
+from optimizers import Adam
+
+
+def main():
+    random.seed(0)
+
+    # 入力2 -> 中間8 (tanh) -> 出力1 (sigmoid)
+    net = Network()
+    net.add(Dense(2, 8, Tanh()))
+    net.add(Dense(8, 1, Sigmoid()))
+    # 初期値が小さすぎると学習が進みにくいので、中間層の重みを広げる
+    net.layers[0].W = asmatrix([[random.gauss(0, 1.0) for _ in range(8)]
+                                for _ in range(2)])
+
+    X = [[0.0, 0.0], [0.0, 1.0], [1.0, 0.0], [1.0, 1.0]] * 16
+    T = [[0.0], [1.0], [1.0], [0.0]] * 16
+
+    print("=== XOR の学習 (バッチサイズ 16, Adam) ===")
+    history = net.fit(asmatrix(X), asmatrix(T), MeanSquaredError(), Adam(0.05),
+                      epochs=200, batch_size=16)
+    for epoch in (0, 9, 49, 99, 199):
+        print(f"エポック {epoch + 1:>3}: 損失 = {history[epoch]:.6f}")
+    print()
+
+    print("=== 学習後の出力 ===")
+    y = tolist(net.predict(X[:4]))
+    for x, t, v in zip(X[:4], T[:4], y):
+        print(f"入力: {x}  正解: {t[0]}  出力: {v[0]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,86 +1,1089 @@
 #!/usr/bin/env python3
+"""
+行列演算モジュール
+
+演算の実体は「バックエンド」に任せ、ここで定義している mat_mul などの関数は
+現在選択中のバックエンドへ処理を振り分けるだけにしている。
+
+    python : 純 Python 版 (行列はリストのリスト)
+    array  : array('d') 1 本に要素を詰めた Matrix 版 (メモリ消費が小さい)
+    numpy  : NumPy 版 (行列は float64 の ndarray, NumPy がある場合のみ)
+
+バックエンドは環境変数 MATRIX_BACKEND か set_backend() で選択する。
+指定が無ければ、NumPy があれば numpy, 無ければ python を使う。
+
+各演算は結果を書き込む行列を out 引数で受け取れる (省略時は新しく確保する)。
+mat_add_inplace など *_inplace の関数は結果を第 1 引数に書き込む。
+"""
+import os
 import random
 import math
+import operator
+import itertools
+from array import array
+
+try:
+    import numpy as np
+except ImportError:     # NumPy が無い環境では純 Python 実装を使う
+    np = None
+
+
+def _dot_map(a, b):
+    """内積 (ベクトル a, b)"""
+    return sum(map(operator.mul, a, b))
+
+
+# 内積: math.sumprod があればそれを使う (Python 3.12 以降)
+_dot = getattr(math, 'sumprod', _dot_map)
+
+
+def _check_inner(a_cols, b_rows):
+    """行列積の内側の次元 (A の列数と B の行数) が一致するか確認
+
+    _dot_map は短い方のベクトルで止まるので、ずれていると黙って誤った積になる。
+    """
+    if a_cols != b_rows:
+        raise ValueError(f'inner dimensions do not match: {a_cols} != {b_rows}')
+
+
+def _check_broadcast(a_shape, b_shape):
+    """B が A と同じ形か、列数が同じ 1 行 (行ごとにくり返すバイアス) か確認"""
+    if b_shape[1] != a_shape[1] or b_shape[0] not in (1, a_shape[0]):
+        raise ValueError(f'shape {b_shape} cannot be broadcast to {a_shape}')
+
+
+def _check_same_shape(a_shape, b_shape):
+    """A と B が同じ形か確認"""
+    if a_shape != b_shape:
+        raise ValueError(f'shapes do not match: {a_shape} != {b_shape}')
+
+
+def _sigmoid(v):
+    """シグモイド関数 (要素 1 つ分)
+
+    exp の引数が常に 0 以下になるよう符号で式を使い分け、オーバーフローを防ぐ。
+    """
+    if v >= 0.0:
+        return 1.0 / (1.0 + math.exp(-v))
+    e = math.exp(v)
+    return e / (1.0 + e)
+
+
+def _sigmoid_deriv(y):
+    """シグモイドの導関数 (出力 y から)"""
+    return y * (1.0 - y)
+
+
+def _relu(v):
+    """ReLU (要素 1 つ分)"""
+    return v if v > 0.0 else 0.0
+
+
+def _relu_deriv(y):
+    """ReLU の導関数 (出力 y から)"""
+    return 1.0 if y > 0.0 else 0.0
+
+
+def _tanh_deriv(y):
+    """tanh の導関数 (出力 y から)"""
+    return 1.0 - y * y
+
+
+def _softmax_row(row):
+    """ソフトマックス (1 行分)。最大値を引いてから exp をとる"""
+    m = max(row)
+    e = [math.exp(v - m) for v in row]
+    s = math.fsum(e)
+    return [v / s for v in e]
+
+
+# dense_forward で使える活性化関数 (None は恒等関数)
+_KERNELS = {
+    'sigmoid': _sigmoid,
+    'relu': _relu,
+    'tanh': math.tanh,
+    'linear': None,
+}
+
+
+def _kernel(name):
+    """名前から要素ごとの活性化関数を取り出す"""
+    if name not in _KERNELS:
+        raise ValueError(f'unknown activation kernel: {name!r}')
+    return _KERNELS[name]
+
+
+class _ElementwiseKernels:
+    """活性化関数のバッチ版 (純 Python 版と array 版で共通)
+
+    要素ごとの関数を apply_func でまとめて適用する。導関数はどれも
+    順伝播の出力 y から計算する。
+    """
+
+    def sigmoid(self, x, out=None):
+        """シグモイド関数"""
+        return self.apply_func(x, _sigmoid, out)
+
+    def sigmoid_deriv(self, y, out=None):
+        """シグモイドの導関数 y * (1 - y)"""
+        return self.apply_func(y, _sigmoid_deriv, out)
+
+    def relu(self, x, out=None):
+        """ReLU"""
+        return self.apply_func(x, _relu, out)
+
+    def relu_deriv(self, y, out=None):
+        """ReLU の導関数 (y > 0 なら 1)"""
+        return self.apply_func(y, _relu_deriv, out)
+
+    def tanh(self, x, out=None):
+        """tanh"""
+        return self.apply_func(x, math.tanh, out)
+
+    def tanh_deriv(self, y, out=None):
+        """tanh の導関数 1 - y^2"""
+        return self.apply_func(y, _tanh_deriv, out)
+
+    def leaky_relu(self, x, alpha, out=None):
+        """Leaky ReLU (負の側の傾きが alpha)"""
+        return self.apply_func(x, lambda v: v if v > 0.0 else alpha * v, out)
+
+    def leaky_relu_deriv(self, y, alpha, out=None):
+        """Leaky ReLU の導関数 (y > 0 なら 1, それ以外は alpha)"""
+        return self.apply_func(y, lambda v: 1.0 if v > 0.0 else alpha, out)
+
+    def softmax(self, x, out=None):
+        """行ごとのソフトマックス"""
+        rows = [_softmax_row(row) for row in self.tolist(x)]
+        if out is None:
+            return self.asmatrix(rows)
+        return self.mat_copy(rows, out)
+
+    def softmax_backward(self, y, dL_dy, out=None):
+        """ソフトマックスの逆伝播 dL/dx = y * (dL/dy - sum(dL/dy * y))"""
+        rows = []
+        for y_row, d_row in zip(self.tolist(y), self.tolist(dL_dy)):
+            s = _dot(y_row, d_row)
+            rows.append([yv * (dv - s) for yv, dv in zip(y_row, d_row)])
+        if out is None:
+            return self.asmatrix(rows)
+        return self.mat_copy(rows, out)
+
+    def cross_entropy(self, y, t, eps):
+        """交差エントロピーの総和 -sum(t * log(y + eps))"""
+        log_y = self.apply_func(y, lambda v: math.log(v + eps))
+        return -self.mat_sum(self.mat_hadamard(t, log_y, log_y))
+
+    def cross_entropy_deriv(self, y, t, eps, out=None):
+        """交差エントロピーの y による微分 -t / (y + eps)"""
+        d = self.apply_func(y, lambda v: -1.0 / (v + eps), out)
+        return self.mat_hadamard(d, t, d)
+
+
+class PythonBackend(_ElementwiseKernels):
+    """純 Python 版: 行列はリストのリスト
+
+    各演算の out には結果を書き込む行列を渡せる (省略時は新しく作る)。
+    要素ごとの演算では out に入力と同じ行列を渡してもよい (インプレース)。
+    """
+    name = 'python'
+    block_size = 64     # mat_mul でまとめて計算する B の列数
+
+    def zeros(self, rows, cols):
+        """ゼロ行列"""
+        return [[0.0] * cols for _ in range(rows)]
+
+    def ones(self, rows, cols):
+        """要素が全て 1 の行列"""
+        return [[1.0] * cols for _ in range(rows)]
+
+    def asmatrix(self, A):
+        """このバックエンドの行列形式に変換"""
+        if isinstance(A, list) and isinstance(A[0], list):
+            return A
+        return [[float(v) for v in row] for row in A]
+
+    def tolist(self, A):
+        """リストのリストに変換"""
+        return [[float(v) for v in row] for row in A]
+
+    def shape(self, A):
+        """(行数, 列数)"""
+        return len(A), len(A[0])
+
+    def mat_copy(self, A, out=None):
+        """行列のコピー"""
+        if out is None:
+            return [list(row) for row in A]
+        for i, row in enumerate(A):
+            out[i][:] = row
+        return out
+
+    def mat_mul(self, A, B, out=None):
+        """行列積 A @ B (out に A, B 自身は渡せない)
+
+        B を転置しておき、A の行と B^T の行の内積を sum(map(operator.mul, ...))
+        (Python 3.12 以降は math.sumprod) で計算する (内側のループを C で
+        回すため)。B の列数が block_size を超える場合は B^T の行を
+        block_size ずつに区切り、同じブロックを A の全行で使い回してから
+        次のブロックに進む。
+        """
+        _check_inner(len(A[0]), len(B))
+        cols_B = len(B[0])
+        Bt = list(zip(*B))
+        dot = _dot
+
+        bs = self.block_size
+        if cols_B <= bs and out is None:
+            return [[dot(a, b) for b in Bt] for a in A]
+
+        result = self.zeros(len(A), cols_B) if out is None else out
+        for j0 in range(0, cols_B, bs):
+            block = Bt[j0:j0 + bs]
+            j1 = j0 + len(block)
+            for i, a in enumerate(A):
+                result[i][j0:j1] = [dot(a, b) for b in block]
+        return result
+
+    def dense_forward(self, x, W, b, kernel, out=None, z_out=None):
+        """全結合層の順伝播 act(x @ W + b) を 1 回の走査で計算
+
+        kernel は活性化関数の名前 ('sigmoid', 'relu', 'tanh', 'linear')。
+        z_out を渡したときだけ活性化前の z = x @ W + b も書き込む。
+        """
+        f = _kernel(kernel)
+        _check_inner(len(x[0]), len(W))
+        Wt = list(zip(*W))
+        bias = b[0]
+        dot = _dot
+
+        result = self.zeros(len(x), len(Wt)) if out is None else out
+        for i, a in enumerate(x):
+            if z_out is None and f is not None:
+                result[i][:] = [f(dot(a, w) + bj) for w, bj in zip(Wt, bias)]
+                continue
+            z = [dot(a, w) + bj for w, bj in zip(Wt, bias)]
+            if z_out is not None:
+                z_out[i][:] = z
+            result[i][:] = z if f is None else [f(v) for v in z]
+        return result
+
+    def mat_add(self, A, B, out=None):
+        """行列和 (ブロードキャスト対応)"""
+        rows_A = len(A)
+        cols_A = len(A[0])
+        rows_B = len(B)
+        _check_broadcast((rows_A, cols_A), (rows_B, len(B[0])))
+
+        result = self.zeros(rows_A, cols_A) if out is None else out
+        for i in range(rows_A):
+            bi = i if rows_B > 1 else 0
+            for j in range(cols_A):
+                result[i][j] = A[i][j] + B[bi][j]
+        return result
+
+    def apply_func(self, mat, f, out=None):
+        """各要素に関数を適用"""
+        if out is None:
+            return [list(map(f, row)) for row in mat]
+        for i, row in enumerate(mat):
+            out[i][:] = map(f, row)
+        return out
+
+    def mat_sub(self, A, B, out=None):
+        """行列差 (ブロードキャスト対応)"""
+        rows_A = len(A)
+        cols_A = len(A[0])
+        rows_B = len(B)
+        _check_broadcast((rows_A, cols_A), (rows_B, len(B[0])))
+
+        result = self.zeros(rows_A, cols_A) if out is None else out
+        for i in range(rows_A):
+            bi = i if rows_B > 1 else 0
+            for j in range(cols_A):
+                result[i][j] = A[i][j] - B[bi][j]
+        return result
+
+    def mat_transpose(self, A, out=None):
+        """転置行列 (out に A 自身は渡せない)"""
+        rows = len(A)
+        cols = len(A[0])
+        # 行と列を逆にした空の行列
+        result = self.zeros(cols, rows) if out is None else out
+        for i in range(rows):
+            for j in range(cols):
+                result[j][i] = A[i][j]
+        return result
+
+    def scalar_mul(self, A, s, out=None):
+        """スカラー倍"""
+        rows = len(A)
+        cols = len(A[0])
+
+        result = self.zeros(rows, cols) if out is None else out
+        for i in range(rows):
+            for j in range(cols):
+                result[i][j] = A[i][j] * s
+        return result
+
+    def mat_hadamard(self, A, B, out=None):
+        """要素ごとの積 (アダマール積)"""
+        rows = len(A)
+        cols = len(A[0])
+        _check_same_shape((rows, cols), (len(B), len(B[0])))
+
+        result = self.zeros(rows, cols) if out is None else out
+        for i in range(rows):
+            for j in range(cols):
+                result[i][j] = A[i][j] * B[i][j]
+        return result
+
+    def mat_col_sum(self, A, out=None):
+        """列ごとの和 (1 行の行列)"""
+        sums = [math.fsum(col) for col in zip(*A)]
+        if out is None:
+            return [sums]
+        out[0][:] = sums
+        return out
+
+    def mat_sum(self, A):
+        """全要素の和"""
+        return math.fsum(v for row in A for v in row)
+
+    def mat_rows(self, A, indices):
+        """indices の行を順に取り出した行列"""
+        return [list(A[i]) for i in indices]
+
+    def adam_update(self, p, g, m, v, lr, beta1, beta2, eps):
+        """Adam の 1 ステップ (p, m, v をその場で更新)"""
+        for p_row, g_row, m_row, v_row in zip(p, g, m, v):
+            for j, gj in enumerate(g_row):
+                mj = m_row[j] = beta1 * m_row[j] + (1.0 - beta1) * gj
+                vj = v_row[j] = beta2 * v_row[j] + (1.0 - beta2) * gj * gj
+                p_row[j] -= lr * mj / (math.sqrt(vj) + eps)
+        return p
+
+
+class Matrix:
+    """1 本の array('d') に要素を詰めて持つ行列 (array バックエンド用)
+
+    要素 (i, j) は data[offset + i * row_stride + j * col_stride] にある。
+    転置はストライドを入れ替えたビューを作るだけなので O(1)。
+
+    Attributes:
+        data (array)    : 要素を格納するバッファ (ビュー同士で共有)
+        rows (int)      : 行数
+        cols (int)      : 列数
+        offset (int)    : 先頭要素の位置
+        row_stride (int): 次の行までの距離
+        col_stride (int): 次の列までの距離
+    """
+    __slots__ = ('data', 'rows', 'cols', 'offset', 'row_stride', 'col_stride')
+
+    def __init__(self, rows, cols, data=None,
+                 offset=0, row_stride=None, col_stride=1):
+        if data is None:
+            data = array('d', bytes(8 * rows * cols))
+        self.data = data
+        self.rows = rows
+        self.cols = cols
+        self.offset = offset
+        self.row_stride = cols if row_stride is None else row_stride
+        self.col_stride = col_stride
+
+    @classmethod
+    def from_rows(cls, rows):
+        """リストのリストなど、行の並びから作る"""
+        data = array('d')
+        n_rows = 0
+        for row in rows:
+            data.extend(float(v) for v in row)
+            n_rows += 1
+        cols = len(data) // n_rows if n_rows else 0
+        return cls(n_rows, cols, data)
+
+    @property
+    def shape(self):
+        """(行数, 列数)"""
+        return self.rows, self.cols
+
+    @property
+    def T(self):
+        """転置ビュー (バッファは共有する)"""
+        return Matrix(self.cols, self.rows, self.data,
+                      self.offset, self.col_stride, self.row_stride)
+
+    def is_contiguous(self):
+        """行優先で隙間なく並んでいるか"""
+        return (self.offset == 0 and self.col_stride == 1
+                and self.row_stride == self.cols
+                and len(self.data) == self.rows * self.cols)
+
+    def row_views(self):
+        """各行をコピーせずに参照する memoryview のリスト"""
+        mv = memoryview(self.data)
+        cols, cs, rs = self.cols, self.col_stride, self.row_stride
+        views = []
+        for i in range(self.rows):
+            start = self.offset + i * rs
+            views.append(mv[start:start + cols * cs:cs])
+        return views
+
+    def flat(self):
+        """行優先に並べた要素の列 (連続していればバッファそのもの)"""
+        if self.is_contiguous():
+            return self.data
+        flat = array('d')
+        for row in self.row_views():
+            flat.extend(row)
+        return flat
+
+    def contiguous(self):
+        """行優先で隙間のない行列 (既にそうなら自分自身)"""
+        if self.is_contiguous():
+            return self
+        return Matrix(self.rows, self.cols, self.flat())
+
+    def tolist(self):
+        """リストのリストに変換"""
+        return [row.tolist() for row in self.row_views()]
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, index):
+        # M[i, j] なら要素, M[i] なら i 行目 (array('d') のコピー)
+        if isinstance(index, tuple):
+            i, j = index
+            return self.data[self.offset + i * self.row_stride
+                             + j * self.col_stride]
+        if index < 0:
+            index += self.rows
+        if not 0 <= index < self.rows:
+            raise IndexError('row index out of range')
+        # 要求された行だけを切り出す
+        start = self.offset + index * self.row_stride
+        stop = start + self.cols * self.col_stride
+        return array('d', memoryview(self.data)[start:stop:self.col_stride])
+
+    def __iter__(self):
+        for row in self.row_views():
+            yield array('d', row)
+
+    def __repr__(self):
+        return f'Matrix({self.tolist()})'
+
+
+class ArrayBackend(_ElementwiseKernels):
+    """array モジュール版: 行列は Matrix (1 本の array('d') + 形状情報)
+
+    out には Matrix を渡す。要素ごとの演算では入力と同じ行列でもよい。
+    """
+    name = 'array'
+    block_size = 64     # mat_mul でまとめて計算する B の列数
+
+    def zeros(self, rows, cols):
+        """ゼロ行列"""
+        return Matrix(rows, cols)
+
+    def ones(self, rows, cols):
+        """要素が全て 1 の行列"""
+        return Matrix(rows, cols, array('d', [1.0]) * (rows * cols))
+
+    def asmatrix(self, A):
+        """Matrix に変換。既に Matrix ならそのまま"""
+        if isinstance(A, Matrix):
+            return A
+        return Matrix.from_rows(A)
+
+    def tolist(self, A):
+        """リストのリストに変換"""
+        return self.asmatrix(A).tolist()
+
+    def shape(self, A):
+        """(行数, 列数)"""
+        A = self.asmatrix(A)
+        return A.rows, A.cols
+
+    def _check_out(self, out, rows, cols):
+        """out の形状を確認"""
+        if (out.rows, out.cols) != (rows, cols):
+            raise ValueError(f'out has shape {(out.rows, out.cols)}, '
+                             f'expected {(rows, cols)}')
+
+    def _store(self, rows, cols, data, out):
+        """行優先の要素列 data を out に書き込む (out が無ければ新しい Matrix)"""
+        if len(data) != rows * cols:
+            raise ValueError(f'got {len(data)} elements for shape {(rows, cols)}')
+        if out is None:
+            return Matrix(rows, cols, data)
+        self._check_out(out, rows, cols)
+        if out.is_contiguous():
+            out.data[:] = data
+        else:
+            for i, view in enumerate(out.row_views()):
+                view[:] = data[i * cols:(i + 1) * cols]
+        return out
+
+    def mat_copy(self, A, out=None):
+        """行列のコピー"""
+        A = self.asmatrix(A)
+        return self._store(A.rows, A.cols, array('d', A.flat()), out)
+
+    def mat_mul(self, A, B, out=None):
+        """行列積 A @ B (B^T の行との内積をブロックごとに計算)
+
+        out に A, B 自身 (やそのビュー) は渡せない。
+        """
+        A = self.asmatrix(A)
+        B = self.asmatrix(B)
+        _check_inner(A.cols, B.rows)
+        a_rows = A.row_views()
+        bt_rows = B.T.row_views()
+        dot = _dot
+        cols = B.cols
+
+        if cols <= self.block_size:
+            data = array('d', [dot(a, b) for a in a_rows for b in bt_rows])
+            return self._store(A.rows, cols, data, out)
+
+        if out is not None and out.is_contiguous():
+            self._check_out(out, A.rows, cols)
+            result = out
+        else:
+            result = Matrix(A.rows, cols)
+        buf = result.data
+        for j0 in range(0, cols, self.block_size):
+            block = bt_rows[j0:j0 + self.block_size]
+            j1 = j0 + len(block)
+            for i, a in enumerate(a_rows):
+                buf[i * cols + j0:i * cols + j1] = \
+                    array('d', [dot(a, b) for b in block])
+        if out is not None and result is not out:
+            return self._store(A.rows, cols, buf, out)
+        return result
+
+    def dense_forward(self, x, W, b, kernel, out=None, z_out=None):
+        """全結合層の順伝播 act(x @ W + b) を 1 回の走査で計算
+
+        kernel は活性化関数の名前 ('sigmoid', 'relu', 'tanh', 'linear')。
+        z_out を渡したときだけ活性化前の z = x @ W + b も書き込む。
+        """
+        f = _kernel(kernel)
+        x = self.asmatrix(x)
+        W = self.asmatrix(W)
+        _check_inner(x.cols, W.rows)
+        x_rows = x.row_views()
+        wt_rows = list(zip(W.T.row_views(), self.asmatrix(b).row_views()[0]))
+        dot = _dot
+
+        if z_out is None and f is not None:
+            data = array('d', [f(dot(a, w) + bj)
+                               for a in x_rows for w, bj in wt_rows])
+            return self._store(x.rows, W.cols, data, out)
+
+        z = array('d', [dot(a, w) + bj for a in x_rows for w, bj in wt_rows])
+        if z_out is not None:
+            self._store(x.rows, W.cols, z, z_out)
+        data = z if f is None else array('d', map(f, z))
+        return self._store(x.rows, W.cols, data, out)
+
+    def _broadcast(self, A, B):
+        """A と同じ並びになるよう B の要素列を用意 (B が 1 行ならくり返す)"""
+        _check_broadcast(A.shape, B.shape)
+        if B.rows == 1 and A.rows > 1:
+            return itertools.cycle(B.row_views()[0])
+        return B.flat()
+
+    def mat_add(self, A, B, out=None):
+        """行列和 (ブロードキャスト対応)"""
+        A = self.asmatrix(A)
+        B = self.asmatrix(B)
+        data = array('d', map(operator.add, A.flat(), self._broadcast(A, B)))
+        return self._store(A.rows, A.cols, data, out)
+
+    def apply_func(self, mat, f, out=None):
+        """各要素に関数を適用"""
+        mat = self.asmatrix(mat)
+        data = array('d', map(f, mat.flat()))
+        return self._store(mat.rows, mat.cols, data, out)
+
+    def mat_sub(self, A, B, out=None):
+        """行列差 (ブロードキャスト対応)"""
+        A = self.asmatrix(A)
+        B = self.asmatrix(B)
+        data = array('d', map(operator.sub, A.flat(), self._broadcast(A, B)))
+        return self._store(A.rows, A.cols, data, out)
+
+    def mat_transpose(self, A, out=None):
+        """転置行列
+
+        out が無ければストライドを入れ替えたビューを返すので O(1)。
+        out があれば転置した要素を書き込む (out に A 自身は渡せない)。
+        """
+        At = self.asmatrix(A).T
+        if out is None:
+            return At
+        return self._store(At.rows, At.cols, At.flat(), out)
+
+    def scalar_mul(self, A, s, out=None):
+        """スカラー倍"""
+        A = self.asmatrix(A)
+        data = array('d', [v * s for v in A.flat()])
+        return self._store(A.rows, A.cols, data, out)
 
+    def mat_hadamard(self, A, B, out=None):
+        """要素ごとの積 (アダマール積)"""
+        A = self.asmatrix(A)
+        B = self.asmatrix(B)
+        _check_same_shape(A.shape, B.shape)
+        data = array('d', map(operator.mul, A.flat(), B.flat()))
+        return self._store(A.rows, A.cols, data, out)
 
-def mat_mul(A, B):
+    def mat_col_sum(self, A, out=None):
+        """列ごとの和 (1 行の行列)"""
+        A = self.asmatrix(A)
+        data = array('d', [math.fsum(col) for col in A.T.row_views()])
+        return self._store(1, A.cols, data, out)
+
+    def mat_sum(self, A):
+        """全要素の和"""
+        return math.fsum(self.asmatrix(A).flat())
+
+    def mat_rows(self, A, indices):
+        """indices の行を順に取り出した行列"""
+        A = self.asmatrix(A)
+        views = A.row_views()
+        data = array('d')
+        n = 0
+        for i in indices:
+            data.extend(views[i])
+            n += 1
+        return Matrix(n, A.cols, data)
+
+    def adam_update(self, p, g, m, v, lr, beta1, beta2, eps):
+        """Adam の 1 ステップ (p, m, v をその場で更新。いずれも連続な Matrix)"""
+        for M in (p, m, v):
+            if not M.is_contiguous():
+                raise ValueError('adam_update needs contiguous matrices')
+        pd, md, vd = p.data, m.data, v.data
+        for k, gk in enumerate(self.asmatrix(g).flat()):
+            mk = md[k] = beta1 * md[k] + (1.0 - beta1) * gk
+            vk = vd[k] = beta2 * vd[k] + (1.0 - beta2) * gk * gk
+            pd[k] -= lr * mk / (math.sqrt(vk) + eps)
+        return p
+
+
+class NumpyBackend:
+    """NumPy 版: 行列は連続した float64 の ndarray
+
+    out には ndarray を渡す (NumPy の ufunc の out 引数と同じ)。
+    """
+    name = 'numpy'
+
+    def zeros(self, rows, cols):
+        """ゼロ行列"""
+        return np.zeros((rows, cols))
+
+    def ones(self, rows, cols):
+        """要素が全て 1 の行列"""
+        return np.ones((rows, cols))
+
+    def asmatrix(self, A):
+        """ndarray (float64, 連続領域) に変換。既に ndarray ならコピーしない"""
+        if isinstance(A, Matrix):
+            A = A.tolist()
+        return np.ascontiguousarray(A, dtype=np.float64)
+
+    def tolist(self, A):
+        """リストのリストに変換"""
+        return self.asmatrix(A).tolist()
+
+    def shape(self, A):
+        """(行数, 列数)"""
+        return np.shape(A)
+
+    def mat_copy(self, A, out=None):
+        """行列のコピー"""
+        if out is None:
+            return np.array(self.asmatrix(A))
+        np.copyto(out, self.asmatrix(A))
+        return out
+
+    def mat_mul(self, A, B, out=None):
+        """行列積 A @ B (out に A, B 自身は渡せない)"""
+        return np.matmul(self.asmatrix(A), self.asmatrix(B), out=out)
+
+    def dense_forward(self, x, W, b, kernel, out=None, z_out=None):
+        """全結合層の順伝播 act(x @ W + b)
+
+        行列積の結果のバッファにバイアス加算と活性化関数をその場で適用し、
+        中間の行列を作らない。z_out を渡したときだけ z = x @ W + b も残す。
+        """
+        _kernel(kernel)
+        z = np.matmul(self.asmatrix(x), self.asmatrix(W),
+                      out=out if z_out is None else z_out)
+        z += self.asmatrix(b)
+        if z_out is None:
+            y = z
+        elif out is None:
+            y = z.copy()
+        else:
+            np.copyto(out, z)
+            y = out
+        if kernel != 'linear':
+            getattr(self, kernel)(y, out=y)
+        return y
+
+    def sigmoid(self, x, out=None):
+        """シグモイド関数
+
+        1 / (1 + e^-x) = exp(-log(1 + e^-x)) とし、log(1 + e^-x) を
+        logaddexp で求めるのでオーバーフローしない。
+        """
+        y = np.negative(self.asmatrix(x), out=out)
+        np.logaddexp(0.0, y, out=y)
+        np.negative(y, out=y)
+        return np.exp(y, out=y)
+
+    def sigmoid_deriv(self, y, out=None):
+        """シグモイドの導関数 y * (1 - y)"""
+        y = self.asmatrix(y)
+        return np.multiply(y, 1.0 - y, out=out)
+
+    def relu(self, x, out=None):
+        """ReLU"""
+        return np.maximum(self.asmatrix(x), 0.0, out=out)
+
+    def relu_deriv(self, y, out=None):
+        """ReLU の導関数 (y > 0 なら 1)"""
+        d = np.greater(self.asmatrix(y), 0.0).astype(np.float64)
+        if out is None:
+            return d
+        np.copyto(out, d)
+        return out
+
+    def tanh(self, x, out=None):
+        """tanh"""
+        return np.tanh(self.asmatrix(x), out=out)
+
+    def tanh_deriv(self, y, out=None):
+        """tanh の導関数 1 - y^2"""
+        d = np.square(self.asmatrix(y), out=out)
+        return np.subtract(1.0, d, out=d)
+
+    def leaky_relu(self, x, alpha, out=None):
+        """Leaky ReLU (負の側の傾きが alpha)"""
+        x = self.asmatrix(x)
+        return np.multiply(x, np.where(x > 0.0, 1.0, alpha), out=out)
+
+    def leaky_relu_deriv(self, y, alpha, out=None):
+        """Leaky ReLU の導関数 (y > 0 なら 1, それ以外は alpha)"""
+        d = np.where(self.asmatrix(y) > 0.0, 1.0, alpha)
+        if out is None:
+            return d
+        np.copyto(out, d)
+        return out
+
+    def softmax(self, x, out=None):
+        """行ごとのソフトマックス (最大値を引いてから exp をとる)"""
+        x = self.asmatrix(x)
+        e = np.subtract(x, x.max(axis=1, keepdims=True), out=out)
+        np.exp(e, out=e)
+        e /= e.sum(axis=1, keepdims=True)
+        return e
+
+    def softmax_backward(self, y, dL_dy, out=None):
+        """ソフトマックスの逆伝播 dL/dx = y * (dL/dy - sum(dL/dy * y))"""
+        y = self.asmatrix(y)
+        dL_dy = self.asmatrix(dL_dy)
+        s = np.einsum('ij,ij->i', y, dL_dy)[:, None]
+        d = np.subtract(dL_dy, s, out=out)
+        return np.multiply(d, y, out=d)
+
+    def mat_add(self, A, B, out=None):
+        """行列和 (ブロードキャスト対応)"""
+        return np.add(self.asmatrix(A), self.asmatrix(B), out=out)
+
+    def apply_func(self, mat, f, out=None):
+        """各要素に関数を適用"""
+        result = np.vectorize(f, otypes=[np.float64])(self.asmatrix(mat))
+        if out is None:
+            return result
+        np.copyto(out, result)
+        return out
+
+    def mat_sub(self, A, B, out=None):
+        """行列差 (ブロードキャスト対応)"""
+        return np.subtract(self.asmatrix(A), self.asmatrix(B), out=out)
+
+    def mat_transpose(self, A, out=None):
+        """転置行列 (out が無ければコピーせずにビューを返す)"""
+        At = self.asmatrix(A).T
+        if out is None:
+            return At
+        np.copyto(out, At)
+        return out
+
+    def scalar_mul(self, A, s, out=None):
+        """スカラー倍"""
+        return np.multiply(self.asmatrix(A), s, out=out)
+
+    def mat_hadamard(self, A, B, out=None):
+        """要素ごとの積 (アダマール積)"""
+        return np.multiply(self.asmatrix(A), self.asmatrix(B), out=out)
+
+    def mat_col_sum(self, A, out=None):
+        """列ごとの和 (1 行の行列)"""
+        return np.sum(self.asmatrix(A), axis=0, keepdims=True, out=out)
+
+    def mat_sum(self, A):
+        """全要素の和"""
+        return float(np.sum(self.asmatrix(A)))
+
+    def mat_rows(self, A, indices):
+        """indices の行を順に取り出した行列"""
+        return self.asmatrix(A)[np.asarray(indices, dtype=np.intp)]
+
+    def cross_entropy(self, y, t, eps):
+        """交差エントロピーの総和 -sum(t * log(y + eps))"""
+        log_y = np.log(self.asmatrix(y) + eps)
+        return -float(np.einsum('ij,ij->', self.asmatrix(t), log_y))
+
+    def cross_entropy_deriv(self, y, t, eps, out=None):
+        """交差エントロピーの y による微分 -t / (y + eps)"""
+        d = np.add(self.asmatrix(y), eps, out=out)
+        np.divide(self.asmatrix(t), d, out=d)
+        return np.negative(d, out=d)
+
+    def adam_update(self, p, g, m, v, lr, beta1, beta2, eps):
+        """Adam の 1 ステップ (p, m, v をその場で更新)"""
+        g = self.asmatrix(g)
+        m *= beta1
+        m += (1.0 - beta1) * g
+        v *= beta2
+        v += (1.0 - beta2) * np.square(g)
+        p -= lr * m / (np.sqrt(v) + eps)
+        return p
+
+
+# バックエンドの登録簿
+_backends = {}
+_backend = None
+
+
+def register_backend(backend):
+    """バックエンドを登録する (backend.name で選択できるようになる)"""
+    _backends[backend.name] = backend
+
+
+def available_backends():
+    """登録済みのバックエンド名の一覧"""
+    return list(_backends)
+
+
+def set_backend(name):
+    """使用するバックエンドを切り替える"""
+    global _backend
+    if name not in _backends:
+        raise ValueError(f'unknown matrix backend: {name!r} '
+                         f'(available: {", ".join(_backends)})')
+    _backend = _backends[name]
+    return _backend
+
+
+def get_backend():
+    """現在のバックエンド"""
+    return _backend
+
+
+register_backend(PythonBackend())
+register_backend(ArrayBackend())
+if np is not None:
+    register_backend(NumpyBackend())
+
+set_backend(os.environ.get('MATRIX_BACKEND',
+                           'numpy' if np is not None else 'python'))
+
+
+# 以下は現在のバックエンドへ処理を振り分けるだけ
+
+def zeros(rows, cols):
+    """ゼロ行列"""
+    return _backend.zeros(rows, cols)
+
+
+def ones(rows, cols):
+    """要素が全て 1 の行列"""
+    return _backend.ones(rows, cols)
+
+
+def asmatrix(A):
+    """現在のバックエンドの行列形式に変換"""
+    return _backend.asmatrix(A)
+
+
+def tolist(A):
+    """リストのリストに変換"""
+    return _backend.tolist(A)
+
+
+def shape(A):
+    """(行数, 列数)"""
+    return _backend.shape(A)
+
+
+def mat_copy(A, out=None):
+    """行列のコピー"""
+    return _backend.mat_copy(A, out)
+
+
+def mat_mul(A, B, out=None):
     """行列積 A @ B"""
-    rows_A = len(A)
-    cols_A = len(A[0])
-    cols_B = len(B[0])
+    return _backend.mat_mul(A, B, out)
 
-    result = [[0.0] * cols_B for _ in range(rows_A)]
-    for i in range(rows_A):
-        for j in range(cols_B):
-            for k in range(cols_A):
-                result[i][j] += A[i][k] * B[k][j]
-    return result
 
+def dense_forward(x, W, b, kernel, out=None, z_out=None):
+    """全結合層の順伝播 act(x @ W + b) (z_out があれば z も書き込む)"""
+    return _backend.dense_forward(x, W, b, kernel, out, z_out)
 
-def mat_add(A, B):
-    """行列和 (ブロードキャスト対応)"""
-    rows_A = len(A)
-    cols_A = len(A[0])
-    rows_B = len(B)
 
-    result = [[0.0] * cols_A for _ in range(rows_A)]
-    for i in range(rows_A):
-        bi = i if rows_B > 1 else 0
-        for j in range(cols_A):
-            result[i][j] = A[i][j] + B[bi][j]
-    return result
+def mat_add(A, B, out=None):
+    """行列和 (ブロードキャスト対応)"""
+    return _backend.mat_add(A, B, out)
 
 
-def apply_func(mat, f):
+def apply_func(mat, f, out=None):
     """各要素に関数を適用"""
-    rows = len(mat)
-    cols = len(mat[0])
-    result = [[0.0] * cols for _ in range(rows)]
-    for i in range(rows):
-        for j in range(cols):
-            result[i][j] = f(mat[i][j])
-    return result
-
-def mat_sub(A, B):
-    """行列差"""
-    rows_A = len(A)
-    cols_A = len(A[0])
-    cols_B = len(B[0])
-    
-	result = [[0.0] * cols_A for _ in range(rows_A)]
-    for i in range(rows_A):
-        bi = i if rows_B > 1 else 0
-        for j in range(cols_A):
-            result[i][j] = A[i][j] - B[bi][j]
-    return result
-
-def mat_transpose(A):
-    rows = len(A)
-    cols = len(A[0])
-    #行と列を逆にしたからの行列
-	result = [[0.0] * rows for _ in range(cols)]
-    for i in rande(rows):
-        for j in range(cols):
-            result[j][i] = A[i][j]
-    return result    
-    
-def scalar_mul(A, s):
-    rows = len(A)
-    cols = len(A[0])
-    
-	result = [[0.0] * cols for _ in range(rows)]
-    for i in range(rows):
-        for j in range(cols):
-            result[i][j] = A[i][j] * s
-    return result
-    
-def mat_hadamard(A, B):
-    rows = len(A)
-    cols = len(A[0])
-    
-	result = [[0.0] * cols for _ in range(rows)]
-    for i in range(rows):
-    	for j in range(cols):
-            result[i][j] = A[i][j] * B[i][j]
-    return result
-    
\ No newline at end of file
+    return _backend.apply_func(mat, f, out)
+
+
+def mat_sub(A, B, out=None):
+    """行列差 (ブロードキャスト対応)"""
+    return _backend.mat_sub(A, B, out)
+
+
+def mat_transpose(A, out=None):
+    """転置行列"""
+    return _backend.mat_transpose(A, out)
+
+
+def scalar_mul(A, s, out=None):
+    """スカラー倍"""
+    return _backend.scalar_mul(A, s, out)
+
+
+def mat_hadamard(A, B, out=None):
+    """要素ごとの積 (アダマール積)"""
+    return _backend.mat_hadamard(A, B, out)
+
+
+# 活性化関数のバッチ版 (導関数は順伝播の出力 y から計算する)
+
+def sigmoid(x, out=None):
+    """シグモイド関数"""
+    return _backend.sigmoid(x, out)
+
+
+def sigmoid_deriv(y, out=None):
+    """シグモイドの導関数 y * (1 - y)"""
+    return _backend.sigmoid_deriv(y, out)
+
+
+def relu(x, out=None):
+    """ReLU"""
+    return _backend.relu(x, out)
+
+
+def relu_deriv(y, out=None):
+    """ReLU の導関数 (y > 0 なら 1)"""
+    return _backend.relu_deriv(y, out)
+
+
+def tanh(x, out=None):
+    """tanh"""
+    return _backend.tanh(x, out)
+
+
+def tanh_deriv(y, out=None):
+    """tanh の導関数 1 - y^2"""
+    return _backend.tanh_deriv(y, out)
+
+
+def leaky_relu(x, alpha, out=None):
+    """Leaky ReLU (負の側の傾きが alpha)"""
+    return _backend.leaky_relu(x, alpha, out)
+
+
+def leaky_relu_deriv(y, alpha, out=None):
+    """Leaky ReLU の導関数 (y > 0 なら 1, それ以外は alpha)"""
+    return _backend.leaky_relu_deriv(y, alpha, out)
+
+
+def softmax(x, out=None):
+    """行ごとのソフトマックス"""
+    return _backend.softmax(x, out)
+
+
+def softmax_backward(y, dL_dy, out=None):
+    """ソフトマックスの逆伝播 (出力 y と dL/dy から dL/dx)"""
+    return _backend.softmax_backward(y, dL_dy, out)
+
+
+# 学習用
+
+def mat_col_sum(A, out=None):
+    """列ごとの和 (1 行の行列)"""
+    return _backend.mat_col_sum(A, out)
+
+
+def mat_sum(A):
+    """全要素の和"""
+    return _backend.mat_sum(A)
+
+
+def mat_rows(A, indices):
+    """indices の行を順に取り出した行列 (ミニバッチの切り出し用)"""
+    return _backend.mat_rows(A, indices)
+
+
+def cross_entropy(y, t, eps=1e-12):
+    """交差エントロピーの総和 -sum(t * log(y + eps))"""
+    return _backend.cross_entropy(y, t, eps)
+
+
+def cross_entropy_deriv(y, t, eps=1e-12, out=None):
+    """交差エントロピーの y による微分 -t / (y + eps)"""
+    return _backend.cross_entropy_deriv(y, t, eps, out)
+
+
+def adam_update(p, g, m, v, lr, beta1, beta2, eps):
+    """Adam の 1 ステップ: m, v を更新し p -= lr * m / (sqrt(v) + eps)"""
+    return _backend.adam_update(p, g, m, v, lr, beta1, beta2, eps)
+
+
+# インプレース版: 結果を第 1 引数の行列に書き込んで返す
+
+def mat_add_inplace(A, B):
+    """A += B (ブロードキャスト対応)"""
+    return _backend.mat_add(A, B, A)
+
+
+def mat_sub_inplace(A, B):
+    """A -= B (ブロードキャスト対応)"""
+    return _backend.mat_sub(A, B, A)
+
+
+def scalar_mul_inplace(A, s):
+    """A *= s"""
+    return _backend.scalar_mul(A, s, A)
+
+
+def mat_hadamard_inplace(A, B):
+    """A *= B (要素ごと)"""
+    return _backend.mat_hadamard(A, B, A)
+
+
+def apply_func_inplace(mat, f):
+    """mat の各要素を f(要素) で置き換える"""
+    return _backend.apply_func(mat, f, mat)
@@ -1,4 +1,7 @@
 #!/usr/bin/env python3
+import random
+from matrix import mat_copy, mat_rows, shape
+from context import Context
 
 
 class Network:
@@ -8,7 +11,80 @@ class Network:
     def add(self, layer):
         self.layers.append(layer)
 
-    def predict(self, x):
+    def forward(self, x, ctx):
+        """逆伝播用の途中経過を ctx (Context) に保存しながら順伝播
+
+        返り値は ctx 内のバッファなので、同じ ctx での次の呼び出しで上書きされる。
+        """
         for layer in self.layers:
-            x = layer.forward(x)
+            x = layer.forward(x, ctx)
         return x
+
+    def backward(self, dL_dy, ctx):
+        """出力側の勾配 dL/dy から各層の勾配を ctx に求める"""
+        for layer in reversed(self.layers):
+            dL_dy = layer.backward(dL_dy, ctx)
+        return dL_dy
+
+    def params(self):
+        """全ての層の学習パラメータ"""
+        return [p for layer in self.layers for p in layer.params()]
+
+    def grads(self, ctx):
+        """backward で求めた勾配 (params と同じ順)"""
+        return [g for layer in self.layers for g in layer.grads(ctx)]
+
+    def predict(self, x, training=False, ctx=None):
+        """順伝播で出力を計算
+
+        training=False (既定) は推論モード。層にもコンテキストにも何も保存せず、
+        前の層の出力は次の層の計算が終わった時点で手放すので、同時に保持する
+        活性はその層の入力と出力の 2 つだけになる。ネットワークの状態を
+        変更しないので、複数のスレッドから同時に呼び出してよい。
+        training=True なら逆伝播用の途中経過を ctx (省略時は新しい Context)
+        に保存する。
+        """
+        if not training:
+            for layer in self.layers:
+                x = layer.forward(x)
+            return x
+
+        y = self.forward(x, ctx if ctx is not None else Context())
+        # ctx のバッファは次の呼び出しで上書きされるため、コピーを返す
+        return mat_copy(y)
+
+    def train_step(self, x, t, loss, optimizer, ctx):
+        """ミニバッチ 1 つ分の学習 (順伝播, 逆伝播, パラメータ更新)。損失を返す"""
+        y = self.forward(x, ctx)
+        value = loss(y, t)
+        rows, cols = shape(y)
+        dL_dy = loss.deriv(y, t, out=ctx[loss].buffer('dy', rows, cols))
+        self.backward(dL_dy, ctx)
+        optimizer.step(self.params(), self.grads(ctx))
+        return value
+
+    def fit(self, X, T, loss, optimizer, epochs=1, batch_size=32,
+            shuffle=True, verbose=False):
+        """ミニバッチ学習
+
+        X, T (データ数 x 次元) からミニバッチを行列のまま切り出して学習する。
+        1 つの Context を使い続けるので、作業用バッファはミニバッチ間で
+        使い回される。返り値はエポックごとの平均損失のリスト。
+        """
+        n, _ = shape(X)
+        ctx = Context()
+        history = []
+        order = list(range(n))
+        for epoch in range(epochs):
+            if shuffle:
+                random.shuffle(order)
+            total = 0.0
+            for start in range(0, n, batch_size):
+                idx = order[start:start + batch_size]
+                x = mat_rows(X, idx)
+                t = mat_rows(T, idx)
+                total += self.train_step(x, t, loss, optimizer, ctx) * len(idx)
+            history.append(total / n)
+            if verbose:
+                print(f"epoch {epoch + 1:>4}: loss = {history[-1]:.6f}")
+        return history
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+最適化手法
+
+step(params, grads) で各パラメータをその勾配を使ってその場で更新する。
+モーメントなどの内部状態はパラメータごとに持ち、同じ行列を使い続ける。
+"""
+import math
+from matrix import (zeros, shape, scalar_mul, scalar_mul_inplace,
+                    mat_add_inplace, mat_sub_inplace, adam_update)
+
+
+class Optimizer:
+    """最適化手法の基底クラス"""
+
+    def __init__(self):
+        # パラメータごとの内部状態 (id(パラメータ) -> 行列のリスト)
+        self._slots = {}
+
+    def _slot(self, param, n):
+        """param 用の内部状態 (param と同じ形のゼロ行列を n 個)"""
+        slot = self._slots.get(id(param))
+        if slot is None:
+            rows, cols = shape(param)
+            slot = self._slots[id(param)] = [zeros(rows, cols)
+                                             for _ in range(n)]
+        return slot
+
+    def step(self, params, grads):
+        raise NotImplementedError
+
+
+class SGD(Optimizer):
+    """確率的勾配降下法 p -= lr * g"""
+
+    def __init__(self, lr=0.01):
+        super().__init__()
+        self.lr = lr
+
+    def step(self, params, grads):
+        for p, g in zip(params, grads):
+            (tmp,) = self._slot(p, 1)
+            mat_sub_inplace(p, scalar_mul(g, self.lr, out=tmp))
+
+
+class Momentum(Optimizer):
+    """モーメンタム付き SGD v = momentum * v - lr * g, p += v"""
+
+    def __init__(self, lr=0.01, momentum=0.9):
+        super().__init__()
+        self.lr = lr
+        self.momentum = momentum
+
+    def step(self, params, grads):
+        for p, g in zip(params, grads):
+            v, tmp = self._slot(p, 2)
+            scalar_mul_inplace(v, self.momentum)
+            mat_sub_inplace(v, scalar_mul(g, self.lr, out=tmp))
+            mat_add_inplace(p, v)
+
+
+class Adam(Optimizer):
+    """Adam (Kingma & Ba, 2015)"""
+
+    def __init__(self, lr=0.001, beta1=0.9, beta2=0.999, eps=1e-8):
+        super().__init__()
+        self.lr = lr
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.t = 0
+
+    def step(self, params, grads):
+        self.t += 1
+        # バイアス補正を学習率にまとめる
+        lr_t = (self.lr * math.sqrt(1.0 - self.beta2 ** self.t)
+                / (1.0 - self.beta1 ** self.t))
+        for p, g in zip(params, grads):
+            m, v = self._slot(p, 2)
+            adam_update(p, g, m, v, lr_t, self.beta1, self.beta2, self.eps)